@@ -0,0 +1,42 @@
+"""
+Агент в подсети проекторов: держит с ними тёплые сессии и выполняет
+команды контроллера (app.py или daemon.py).
+
+    python src/agent.py --host 10.20.0.5 --port 7101
+
+Аутентификации нет, пароли проекторов приходят открытым текстом:
+по умолчанию агент слушает только 127.0.0.1, адрес задаётся явно и
+только в доверенной сети (интерфейс, видимый контроллеру, а не
+0.0.0.0).
+
+В файле шоу у проектора за агентом указывается "relay": "host:port".
+Несколько агентов можно запустить на одной машине с разными портами.
+"""
+import argparse
+import asyncio
+
+from lib.relay import DEFAULT_PORT, KEEPALIVE, RelayAgent
+
+
+async def run(host, port, keepalive):
+    agent = await RelayAgent(host, port, keepalive).start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await agent.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="3P Shutter Control agent")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--keepalive", type=float, default=KEEPALIVE)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args.host, args.port, args.keepalive))
+    except KeyboardInterrupt:
+        print("Stopped.")
+
+
+if __name__ == "__main__":
+    main()
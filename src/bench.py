@@ -0,0 +1,277 @@
+"""
+Замеры на имитациях проекторов (lib/simulator.py).
+
+    python src/bench.py --count 40 --dead 2 --latency 0.005 --jitter 0.002
+
+single  — задержка одной команды на одном проекторе (p50/p95/max)
+fire    — разброс прихода команды шаттера на группу, обычный запуск
+          против синхронного (GroupFire)
+refresh — время полного обновления всех проекторов (Controller.refresh)
+cue     — задержка команды шаттера при непрерывном опросе всех
+          проекторов и ожидание слота пула по очередям
+startup — время от запуска daemon.py до выполнения первой OSC-команды;
+          при превышении бюджета (--budget) код выхода 1
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from pythonosc.osc_message_builder import build_msg
+
+from lib.controller import Controller
+from lib.group_fire import fire_synchronized
+from lib.metrics import METRICS
+from lib.projector import Projector
+from lib.simulator import SimulatedFleet
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def make_projectors(fleet, alive_only=False):
+    projectors = []
+    for index, unit in enumerate(fleet.units):
+        if alive_only and unit.unresponsive:
+            continue
+        projectors.append(Projector(
+            ip=unit.host,
+            port=unit.port,
+            login=unit.login,
+            password=unit.password,
+            label=f'SIM{index + 1}',
+            id=index + 1,
+        ))
+    return projectors
+
+
+def arrival_spread(fleet, cmd):
+    arrivals = []
+    for unit in fleet.units:
+        times = [at for at, received in unit.log if received == cmd]
+        if times:
+            arrivals.append(times[-1])
+    return max(arrivals) - min(arrivals) if arrivals else 0.0
+
+
+async def bench_single(fleet, repeat):
+    projector = make_projectors(fleet, alive_only=True)[0]
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await projector.send_cmd('QSH')
+        samples.append(time.perf_counter() - started)
+    projector.close()
+    return {
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p95_ms': percentile(samples, 95) * 1000,
+        'max_ms': max(samples) * 1000,
+        'pool': projector.pool.stats(),
+    }
+
+
+async def bench_fire(fleet, repeat):
+    projectors = make_projectors(fleet, alive_only=True)
+    naive = []
+    synced = []
+    for index in range(repeat):
+        cmd = 'OSH:0' if index % 2 == 0 else 'OSH:1'
+        await asyncio.gather(*(p.send_cmd(cmd) for p in projectors))
+        naive.append(arrival_spread(fleet, cmd))
+
+        cmd = 'OSH:1' if index % 2 == 0 else 'OSH:0'
+        await fire_synchronized(projectors, cmd)
+        synced.append(arrival_spread(fleet, cmd))
+    for projector in projectors:
+        projector.close()
+    return {
+        'naive_p50_ms': percentile(naive, 50) * 1000,
+        'sync_p50_ms': percentile(synced, 50) * 1000,
+        'naive_max_ms': max(naive) * 1000,
+        'sync_max_ms': max(synced) * 1000,
+    }
+
+
+async def bench_refresh(fleet, repeat):
+    controller = Controller()
+    for projector in make_projectors(fleet):
+        controller.add(projector)
+    walls = []
+    for _ in range(repeat):
+        report = await controller.refresh(title="Bench")
+        walls.append(report.wall_time)
+    for projector in controller.projectors:
+        projector.close()
+    return {
+        'p50_s': percentile(walls, 50),
+        'max_s': max(walls),
+        'failed': len(report.errors),
+    }
+
+
+async def bench_cue(fleet, repeat):
+    controller = Controller()
+    for projector in make_projectors(fleet, alive_only=True):
+        controller.add(projector)
+
+    async def load():
+        while True:
+            await controller.refresh(title="Load")
+
+    METRICS.histograms.clear()
+    polling = asyncio.create_task(load())
+    samples = []
+    cue_started = time.monotonic()
+    for index in range(repeat):
+        await asyncio.sleep(0.01)
+        projector = controller.projectors[index % len(controller.projectors)]
+        started = time.perf_counter()
+        # force: опрос уже подтвердил состояние, без него команда
+        # не уходит на проектор и замеряется попадание в кэш
+        if index % 2 == 0:
+            await projector.shutter_open(force=True)
+        else:
+            await projector.shutter_close(force=True)
+        samples.append(time.perf_counter() - started)
+    polling.cancel()
+    delivered = sum(
+        1 for unit in fleet.units for at, cmd in unit.log
+        if at >= cue_started and cmd.startswith('OSH:')
+    )
+    for projector in controller.projectors:
+        projector.close()
+    waits = {}
+    for lane in ('control', 'refresh'):
+        histogram = METRICS.histograms.get(('*', f'lane:{lane}', 'queue'))
+        if histogram is not None:
+            waits[f'{lane}_wait_p95_ms'] = histogram.percentile(95) * 1000
+    return {
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p95_ms': percentile(samples, 95) * 1000,
+        'delivered': f'{delivered}/{repeat}',
+        **waits,
+    }
+
+
+async def bench_startup(fleet, repeat):
+    unit = fleet.units[0]
+    with tempfile.NamedTemporaryFile(
+            "w", suffix=".txt", delete=False) as file:
+        file.write("1000,800\n" + "\n".join(fleet.projector_lines()) + "\n")
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    daemon = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'daemon.py')
+    cue = build_msg('/shutter/open/SIM1', 3).dgram
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_datagram_endpoint(
+        asyncio.DatagramProtocol, remote_addr=('127.0.0.1', port)
+    )
+    samples = []
+    try:
+        for _ in range(repeat):
+            unit.shutter = '1'
+            unit.log.clear()
+            started = time.perf_counter()
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, daemon, file.name, '--port', str(port),
+                '--metrics-interval', '0',
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            # Команда повторяется, пока проектор её не получит
+            while not any(cmd == 'OSH:0' for at, cmd in unit.log):
+                if time.perf_counter() - started > 10:
+                    break
+                transport.sendto(cue)
+                await asyncio.sleep(0.005)
+            samples.append(time.perf_counter() - started)
+            process.terminate()
+            await process.wait()
+    finally:
+        transport.close()
+        os.remove(file.name)
+    return {
+        'first_cue_p50_s': percentile(samples, 50),
+        'first_cue_max_s': max(samples),
+    }
+
+
+BENCHMARKS = {
+    'single': (bench_single, 200),
+    'fire': (bench_fire, 20),
+    'refresh': (bench_refresh, 3),
+    'cue': (bench_cue, 100),
+    'startup': (bench_startup, 5),
+}
+
+# Бюджеты на регрессию: (показатель, максимум)
+BUDGETS = {
+    'startup': ('first_cue_max_s', 1.0),
+}
+
+
+async def run(args):
+    fleet = SimulatedFleet(
+        args.count,
+        dead=args.dead,
+        latency=args.latency,
+        jitter=args.jitter,
+        drop_rate=args.drop,
+    )
+    await fleet.start()
+    results = {}
+    try:
+        for name in args.only or BENCHMARKS:
+            bench, repeat = BENCHMARKS[name]
+            results[name] = await bench(fleet, args.repeat or repeat)
+    finally:
+        await fleet.stop()
+
+    for name, result in results.items():
+        values = ', '.join(
+            f'{key} {value:.3f}' if isinstance(value, float)
+            else f'{key} {value}'
+            for key, value in result.items()
+        )
+        print(f'{name:8} {values}')
+
+    failed = False
+    for name, (key, limit) in BUDGETS.items():
+        if name not in results:
+            continue
+        if name == 'startup' and args.budget:
+            limit = args.budget
+        value = results[name][key]
+        status = 'ok' if value <= limit else 'EXCEEDED'
+        print(f'budget   {name} {key} {value:.3f} <= {limit:.3f} {status}')
+        failed = failed or value > limit
+    return results, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="3P Shutter benchmarks")
+    parser.add_argument("--count", type=int, default=40)
+    parser.add_argument("--dead", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--jitter", type=float, default=0.001)
+    parser.add_argument("--drop", type=float, default=0.0)
+    parser.add_argument("--repeat", type=int, default=0)
+    parser.add_argument("--only", nargs="*", choices=list(BENCHMARKS))
+    parser.add_argument("--budget", type=float, default=0.0,
+                        help="time-to-first-cue budget, s")
+    results, failed = asyncio.run(run(parser.parse_args()))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
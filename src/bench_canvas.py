@@ -0,0 +1,121 @@
+"""
+Замер кадров CanvasView (app.py --canvas) без проекторов. Нужен
+экран; на сервере — виртуальный:
+
+    xvfb-run python src/bench_canvas.py --count 200
+
+drag   — перетаскивание проектора: событие B1-Motion и перерисовка
+update — изменения состояния всех проекторов за один цикл Tk (как
+         после опроса): mark_dirty, flush и перерисовка
+
+Для каждого печатаются p50/p95/max обработчика (frame_times) и всего
+кадра вместе с отрисовкой Tk (update_idletasks). Если p95 кадра больше
+FRAME_BUDGET, код выхода 1; если экрана нет, код выхода 2.
+"""
+import argparse
+import sys
+import time
+from tkinter import TclError, Tk
+
+from canvas_view import FRAME_BUDGET, UNIT_HEIGHT, CanvasView
+from lib.metrics import Histogram
+from lib.projector import Projector
+
+BUTTON1 = 0x100  # Маска зажатой левой кнопки в event.state
+
+
+def make_view(root, count):
+    view = CanvasView(root, bridge=None, controller=None,
+                      remove_callback=lambda unit: None)
+    units = []
+    for index in range(count):
+        projector = Projector(
+            ip=f'10.0.{index // 250}.{index % 250 + 1}',
+            port=1024,
+            login='admin',
+            password='panasonic',
+            label=f'SIM{index + 1}',
+            id=index + 1,
+        )
+        projector.power = True
+        projector.shutter = False
+        # Раскладка как у simulator.py --write: 4 столбца
+        units.append(view.add(
+            projector, 10 + (index % 4) * 250, 10 + (index // 4) * 100))
+    return view, units
+
+
+def bench_drag(root, view, unit, frames):
+    canvas = view.canvas
+    # Пустое место на проекторе, не кнопка
+    x, y = int(unit.x) + 110, int(unit.y) + UNIT_HEIGHT // 4
+    canvas.event_generate('<Motion>', x=x, y=y)
+    canvas.event_generate('<Button-1>', x=x, y=y)
+    root.update_idletasks()
+    totals = Histogram(size=frames)
+    for index in range(frames):
+        # Туда и обратно по 3 px, проектор остаётся на экране
+        step = 3 if (index // 50) % 2 == 0 else -3
+        x, y = x + step, y + step
+        started = time.perf_counter()
+        canvas.event_generate('<Motion>', x=x, y=y, state=BUTTON1)
+        root.update_idletasks()
+        totals.add(time.perf_counter() - started)
+    canvas.event_generate('<ButtonRelease-1>', x=x, y=y)
+    root.update_idletasks()
+    return totals
+
+
+def bench_update(root, view, units, frames):
+    totals = Histogram(size=frames)
+    for index in range(frames):
+        started = time.perf_counter()
+        for unit in units:
+            unit.projector.shutter = index % 2 == 0
+            unit.show_status_changes(['power', 'shutter'])
+        root.update_idletasks()
+        totals.add(time.perf_counter() - started)
+    return totals
+
+
+def row(name, handler, totals):
+    p95 = totals.percentile(95)
+    status = 'ok' if p95 <= FRAME_BUDGET else 'EXCEEDED'
+    print(
+        f"{name:7} handler p50={handler.percentile(50) * 1000:.2f} "
+        f"p95={handler.percentile(95) * 1000:.2f} ms | frame "
+        f"p50={totals.percentile(50) * 1000:.2f} "
+        f"p95={p95 * 1000:.2f} "
+        f"max={totals.percentile(100) * 1000:.2f} ms | "
+        f"budget {FRAME_BUDGET * 1000:.0f} ms {status}"
+    )
+    return p95 <= FRAME_BUDGET
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CanvasView frame times")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    try:
+        root = Tk()
+    except TclError as e:
+        # Без экрана замер ничего не скажет: Tk не рисует
+        print(f"No display: {e}. Run under xvfb-run.")
+        sys.exit(2)
+    root.geometry("1280x800")
+    view, units = make_view(root, args.count)
+    root.update()
+
+    drag = bench_drag(root, view, units[0], args.frames)
+    update = bench_update(root, view, units, args.frames)
+    print(f"{args.count} projectors, {args.frames} frames")
+    ok = row('drag', view.frame_times['drag'], drag)
+    ok = row('update', view.frame_times['update'], update) and ok
+    root.destroy()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
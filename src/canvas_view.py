@@ -0,0 +1,413 @@
+import time
+from tkinter import Canvas, Frame, Button, Label, Scrollbar
+from tkinter import ttk
+
+from lib.metrics import Histogram
+
+BACKGROUND = "#363537"
+UNIT_WIDTH = 240
+UNIT_HEIGHT = 84
+FRAME_BUDGET = 0.016  # 60 кадров в секунду
+
+
+def power_color(projector):
+    if projector.power is None:
+        return "gray"
+    return "green" if projector.power else "red"
+
+
+def screen_status(projector):
+    if projector.shutter is None:
+        return '?', 'gray'
+    if projector.shutter:
+        return 'Closed', 'red'
+    return 'Open', 'green'
+
+
+def shutter_times(projector):
+    shutter_in = projector.shutter_in_time
+    shutter_out = projector.shutter_out_time
+    return (f"In {'?' if shutter_in is None else shutter_in}   "
+            f"Out {'?' if shutter_out is None else shutter_out}")
+
+
+class CanvasUnit:
+    """
+    Проектор на CanvasView: только номера элементов холста и позиция,
+    без виджетов. Интерфейс для MainFrame — как у ProjectorFrame.
+    """
+
+    __slots__ = ('view', 'projector', 'tag', 'items', 'x', 'y', 'error')
+
+    def __init__(self, view, projector, tag, x, y) -> None:
+        self.view = view
+        self.projector = projector
+        self.tag = tag
+        self.items = {}
+        self.x = x
+        self.y = y
+        self.error = None
+
+    def position(self):
+        return self.x, self.y
+
+    def show_status_changes(self, changed, error=None):
+        self.view.mark_dirty(self, changed, error)
+
+
+class CanvasView:
+    """
+    Все проекторы — элементы одного Canvas вместо ~10 виджетов на каждый.
+
+    Кнопки Open/Close и Grp нарисованы на холсте, списки времени шаттера
+    и удаление создаются только для редактируемого проектора (клик по
+    "⋯"). Перетаскивание двигает элементы проектора одним canvas.move.
+    Изменения состояния копятся и рисуются раз за цикл Tk (after_idle),
+    перерисовываются только изменившиеся элементы и только у видимых
+    проекторов; остальные дорисовываются при прокрутке. Время обработки
+    пишется в frame_times, кадры дольше FRAME_BUDGET печатаются.
+    """
+
+    def __init__(self, parent, bridge, controller, remove_callback,
+                 edit_callback=None) -> None:
+        self.bridge = bridge
+        self.controller = controller
+        self.remove_callback = remove_callback
+        self.edit_callback = edit_callback
+        self.units = {}
+        self._next_tag = 0
+        self._dirty = {}
+        self._stale = {}
+        self._flush_job = None
+        self._drag = None
+        self._editor = None
+        self.frame_times = {'drag': Histogram(), 'update': Histogram()}
+
+        self.canvas = Canvas(
+            parent, background="#938BA1", highlightthickness=0
+        )
+        self.vbar = Scrollbar(parent, orient='vertical',
+                              command=self.yview)
+        self.hbar = Scrollbar(parent, orient='horizontal',
+                              command=self.xview)
+        self.canvas.configure(yscrollcommand=self.vbar.set,
+                              xscrollcommand=self.hbar.set)
+        self.vbar.pack(side='right', fill='y')
+        self.hbar.pack(side='bottom', fill='x')
+        self.canvas.pack(side='left', fill='both', expand=True)
+
+        self.canvas.bind("<Button-1>", self.on_press)
+        self.canvas.bind("<B1-Motion>", self.on_motion)
+        self.canvas.bind("<ButtonRelease-1>", self.on_release)
+        self.canvas.bind("<Configure>", lambda event: self.show_stale())
+
+    # Проекторы
+
+    def add(self, projector, x, y):
+        self._next_tag += 1
+        unit = CanvasUnit(self, projector, f"u{self._next_tag}", x, y)
+        self.units[unit.tag] = unit
+        self.draw(unit)
+        self.update_scrollregion()
+        return unit
+
+    def draw(self, unit):
+        canvas = self.canvas
+        projector = unit.projector
+        x, y = unit.x, unit.y
+        tags = (unit.tag,)
+        text, color = screen_status(projector)
+        items = unit.items
+        items['body'] = canvas.create_rectangle(
+            x, y, x + UNIT_WIDTH, y + UNIT_HEIGHT,
+            fill=BACKGROUND, outline="black", tags=tags
+        )
+        items['power'] = canvas.create_oval(
+            x + 8, y + 9, x + 18, y + 19,
+            fill=power_color(projector), outline="", tags=tags
+        )
+        items['label'] = canvas.create_text(
+            x + 26, y + 14, anchor='w', text=projector.label,
+            font=("Helvetica", 12, "bold"), fill="white", tags=tags
+        )
+        items['group'] = canvas.create_text(
+            x + UNIT_WIDTH - 34, y + 14, anchor='e',
+            text=self.group_text(projector), fill="white",
+            tags=tags + ('group',)
+        )
+        items['edit'] = canvas.create_text(
+            x + UNIT_WIDTH - 12, y + 14, text="⋯", fill="white",
+            font=("Helvetica", 14, "bold"), tags=tags + ('edit',)
+        )
+        self.draw_button(unit, 'open', 'Open', "#04A777", x + 8, y + 30)
+        self.draw_button(unit, 'close', 'Close', "#DC758F", x + 74, y + 30)
+        items['status_bg'] = canvas.create_rectangle(
+            x + 140, y + 30, x + 200, y + 54,
+            fill=color, outline="", tags=tags
+        )
+        items['status'] = canvas.create_text(
+            x + 170, y + 42, text=text, fill="white", tags=tags
+        )
+        items['times'] = canvas.create_text(
+            x + 8, y + 70, anchor='w', text=shutter_times(projector),
+            fill="white", tags=tags
+        )
+        if not projector.online:
+            self.show_offline(unit)
+
+    def draw_button(self, unit, action, text, color, x, y):
+        tags = (unit.tag, action)
+        self.canvas.create_rectangle(
+            x, y, x + 60, y + 24, fill=color, outline="", tags=tags
+        )
+        self.canvas.create_text(
+            x + 30, y + 12, text=text, fill="white", tags=tags
+        )
+
+    def remove(self, unit):
+        if self.units.pop(unit.tag, None) is None:
+            return
+        if self._editor is not None and self._editor[0] is unit:
+            self.close_editor()
+        self._dirty.pop(unit, None)
+        self._stale.pop(unit, None)
+        self.canvas.delete(unit.tag)
+        self.update_scrollregion()
+        self.remove_callback(unit)
+
+    @staticmethod
+    def group_text(projector):
+        return f"{'☑' if projector.group else '☐'} Grp"
+
+    # Перерисовка
+
+    def mark_dirty(self, unit, changed, error=None):
+        self._dirty.setdefault(unit, set()).update(changed)
+        unit.error = error
+        if self._flush_job is None:
+            self._flush_job = self.canvas.after_idle(self.flush)
+
+    def flush(self):
+        started = time.perf_counter()
+        self._flush_job = None
+        dirty, self._dirty = self._dirty, {}
+        visible = self.visible_area()
+        for unit, changed in dirty.items():
+            if unit.tag not in self.units:
+                continue
+            if self.is_visible(unit, visible):
+                self.redraw(unit, changed)
+            else:
+                self._stale.setdefault(unit, set()).update(changed)
+        self.observe('update', started)
+
+    def show_stale(self):
+        if not self._stale:
+            return
+        started = time.perf_counter()
+        visible = self.visible_area()
+        for unit in list(self._stale):
+            if self.is_visible(unit, visible):
+                self.redraw(unit, self._stale.pop(unit))
+        self.observe('update', started)
+
+    def visible_area(self):
+        canvas = self.canvas
+        return (
+            canvas.canvasx(0), canvas.canvasy(0),
+            canvas.canvasx(canvas.winfo_width()),
+            canvas.canvasy(canvas.winfo_height()),
+        )
+
+    @staticmethod
+    def is_visible(unit, area):
+        left, top, right, bottom = area
+        return (unit.x < right and unit.x + UNIT_WIDTH > left
+                and unit.y < bottom and unit.y + UNIT_HEIGHT > top)
+
+    def redraw(self, unit, changed):
+        projector = unit.projector
+        if not projector.online:
+            self.show_offline(unit)
+            return
+        if 'online' in changed:
+            changed = changed | {'power', 'shutter'}
+        if unit.error is not None:
+            if 'power' in changed:
+                self.update_power(unit)
+            self.set_status(unit, 'Error', '#000000')
+            return
+        if 'power' in changed:
+            self.update_power(unit)
+        if 'shutter' in changed:
+            self.set_status(unit, *screen_status(projector))
+        if 'shutter_in_time' in changed or 'shutter_out_time' in changed:
+            self.canvas.itemconfigure(
+                unit.items['times'], text=shutter_times(projector)
+            )
+            if self._editor is not None and self._editor[0] is unit:
+                self.update_editor()
+
+    def update_power(self, unit):
+        self.canvas.itemconfigure(
+            unit.items['power'], fill=power_color(unit.projector)
+        )
+
+    def set_status(self, unit, text, color):
+        self.canvas.itemconfigure(unit.items['status_bg'], fill=color)
+        self.canvas.itemconfigure(unit.items['status'], text=text)
+
+    def show_offline(self, unit):
+        self.canvas.itemconfigure(unit.items['power'], fill="gray")
+        self.set_status(unit, 'Offline', '#000000')
+
+    def observe(self, kind, started):
+        elapsed = time.perf_counter() - started
+        self.frame_times[kind].add(elapsed)
+        if elapsed > FRAME_BUDGET:
+            print(f"Slow {kind} frame: {elapsed * 1000:.1f} ms "
+                  f"({len(self.units)} projectors)")
+
+    # Прокрутка
+
+    def xview(self, *args):
+        self.canvas.xview(*args)
+        self.show_stale()
+
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self.show_stale()
+
+    def update_scrollregion(self):
+        box = self.canvas.bbox('all')
+        if box is None:
+            box = (0, 0, 0, 0)
+        self.canvas.configure(
+            scrollregion=(0, 0, box[2] + 10, box[3] + 10)
+        )
+
+    # Мышь
+
+    def unit_at(self, event):
+        tags = self.canvas.gettags('current')
+        for tag in tags:
+            unit = self.units.get(tag)
+            if unit is not None:
+                return unit, tags
+        return None, tags
+
+    def on_press(self, event):
+        unit, tags = self.unit_at(event)
+        if unit is None:
+            return
+        projector = unit.projector
+        if 'open' in tags:
+            self.bridge.submit(self.controller.shutter_open(projector))
+        elif 'close' in tags:
+            self.bridge.submit(self.controller.shutter_close(projector))
+        elif 'group' in tags:
+            self.controller.set_group(projector, not projector.group)
+            self.canvas.itemconfigure(
+                unit.items['group'], text=self.group_text(projector)
+            )
+            if self.edit_callback is not None:
+                self.edit_callback(unit, 'group')
+        elif 'edit' in tags:
+            self.toggle_editor(unit)
+        else:
+            self.canvas.tag_raise(unit.tag)
+            self._drag = (unit, self.canvas.canvasx(event.x),
+                          self.canvas.canvasy(event.y))
+
+    def on_motion(self, event):
+        if self._drag is None:
+            return
+        started = time.perf_counter()
+        unit, last_x, last_y = self._drag
+        x = self.canvas.canvasx(event.x)
+        y = self.canvas.canvasy(event.y)
+        dx, dy = x - last_x, y - last_y
+        # Все элементы проектора (и открытый редактор) — один тег
+        self.canvas.move(unit.tag, dx, dy)
+        unit.x += dx
+        unit.y += dy
+        self._drag = (unit, x, y)
+        self.observe('drag', started)
+
+    def on_release(self, event):
+        if self._drag is None:
+            return
+        unit = self._drag[0]
+        self._drag = None
+        unit.x, unit.y = int(unit.x), int(unit.y)
+        self.update_scrollregion()
+        self.show_stale()
+        if self.edit_callback is not None:
+            self.edit_callback(unit, 'position')
+
+    # Редактор: настоящие виджеты только для одного проектора
+
+    def toggle_editor(self, unit):
+        editing = self._editor is not None and self._editor[0] is unit
+        self.close_editor()
+        if not editing:
+            self.open_editor(unit)
+
+    def open_editor(self, unit):
+        projector = unit.projector
+        frame = Frame(self.canvas, borderwidth=1, relief='solid',
+                      background=BACKGROUND)
+        shutter_in = ttk.Combobox(
+            frame, values=projector.shutter_time_dict,
+            state="readonly", width=5
+        )
+        shutter_out = ttk.Combobox(
+            frame, values=projector.shutter_time_dict,
+            state="readonly", width=5
+        )
+        shutter_in.bind(
+            "<<ComboboxSelected>>",
+            lambda event: self.bridge.submit(
+                projector.set_shutter_in(shutter_in.get()))
+        )
+        shutter_out.bind(
+            "<<ComboboxSelected>>",
+            lambda event: self.bridge.submit(
+                projector.set_shutter_out(shutter_out.get()))
+        )
+        Label(frame, text="In", foreground="white",
+              background=BACKGROUND).grid(row=0, column=0, padx=2)
+        shutter_in.grid(row=0, column=1, pady=2)
+        Label(frame, text="Out", foreground="white",
+              background=BACKGROUND).grid(row=0, column=2, padx=2)
+        shutter_out.grid(row=0, column=3, pady=2)
+        Button(
+            frame, text='Update', highlightthickness=0,
+            command=lambda: self.bridge.submit(
+                self.controller.refresh([projector]))
+        ).grid(row=0, column=4, padx=2)
+        Button(
+            frame, text='x', bg="#F24333", fg="white", width=1,
+            highlightthickness=0, command=lambda: self.remove(unit)
+        ).grid(row=0, column=5, padx=2)
+        window = self.canvas.create_window(
+            unit.x, unit.y + UNIT_HEIGHT, anchor='nw', window=frame,
+            tags=(unit.tag,)
+        )
+        self._editor = (unit, window, frame, shutter_in, shutter_out)
+        self.update_editor()
+
+    def update_editor(self):
+        unit, window, frame, shutter_in, shutter_out = self._editor
+        if unit.projector.shutter_in_time is not None:
+            shutter_in.set(unit.projector.shutter_in_time)
+        if unit.projector.shutter_out_time is not None:
+            shutter_out.set(unit.projector.shutter_out_time)
+
+    def close_editor(self):
+        if self._editor is None:
+            return
+        unit, window, frame = self._editor[:3]
+        self._editor = None
+        self.canvas.delete(window)
+        frame.destroy()
@@ -0,0 +1,107 @@
+"""
+Запуск без интерфейса: только OSC-маршруты и команды проекторам.
+
+    python src/daemon.py show.json --host 0.0.0.0 --port 7001
+
+Старый projectors.txt тоже читается. tkinter при этом не импортируется.
+"""
+import argparse
+import asyncio
+
+from lib.controller import Controller
+from lib.showfile import ShowFile, write_show
+from lib.startup import StartupTimer
+
+
+async def save_show(show):
+    # Копия снимается в цикле, json.dump и fsync идут в потоке, чтобы
+    # не задерживать OSC и команды проекторам
+    snapshot = show.snapshot()
+    if snapshot is None:
+        return
+    write = asyncio.ensure_future(asyncio.to_thread(write_show, *snapshot))
+    try:
+        await asyncio.shield(write)
+    finally:
+        # Отменённый autosave всё равно дожидается начатой записи, иначе
+        # она могла бы заменить файл уже после финального сохранения
+        await asyncio.wait([write])
+        if write.exception() is not None:
+            show.dirty = True
+
+
+async def autosave(show, interval):
+    # Последнее известное состояние пишется в файл шоу (только JSON)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await save_show(show)
+        except OSError as e:
+            print(f"Error while saving show: {e}")
+
+
+async def run(file_path, host, port, metrics_interval, metrics_file,
+              autosave_interval=10, timer=None, record=None):
+    timer = timer or StartupTimer()
+    controller = Controller(host=host, port=port)
+    controller.metrics_interval = metrics_interval
+    controller.metrics_file = metrics_file
+    if record:
+        controller.record(record)
+    show = ShowFile()
+    projectors = []
+    for projector, x, y in show.load(file_path):
+        if controller.add(projector):
+            projectors.append(projector)
+        else:
+            show.remove(projector)
+            projector.close()
+    controller.set_scenes(show.scenes)
+    controller.add_listener(
+        lambda projector, changed, error=None: show.update(
+            projector, changed)
+    )
+    timer.mark("show loaded")
+    controller.add_probe_listener(timer.first_probe)
+
+    await controller.start()
+    timer.mark("osc bind")
+    print(f"OSC listening on {host}:{port}, {len(projectors)} projectors")
+    saver = asyncio.create_task(autosave(show, autosave_interval))
+    try:
+        await controller.refresh(title="Load")
+        await asyncio.Event().wait()
+    finally:
+        saver.cancel()
+        await asyncio.gather(saver, return_exceptions=True)
+        await controller.stop()
+        await save_show(show)
+
+
+def main():
+    timer = StartupTimer()
+    parser = argparse.ArgumentParser(description="3P Shutter Control daemon")
+    parser.add_argument(
+        "file", help="show.json or IP,PORT,USERNAME,PASSWORD,LABEL,X,Y")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7001)
+    parser.add_argument("--metrics-interval", type=float, default=60)
+    parser.add_argument("--metrics-file")
+    parser.add_argument("--autosave", type=float, default=10)
+    parser.add_argument("--startup-report", action="store_true")
+    parser.add_argument(
+        "--record", help="write OSC and projector traffic to this log")
+    args = parser.parse_args()
+    timer.verbose = args.startup_report
+    try:
+        asyncio.run(run(
+            args.file, args.host, args.port,
+            args.metrics_interval, args.metrics_file, args.autosave, timer,
+            args.record
+        ))
+    except KeyboardInterrupt:
+        print("Stopped.")
+
+
+if __name__ == "__main__":
+    main()
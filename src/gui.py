@@ -0,0 +1,674 @@
+from tkinter import (Tk,
+                     IntVar, Frame,
+                     Toplevel, Button, Checkbutton,
+                     Label, Entry, filedialog)
+from tkinter import ttk  # Для выпадающих списков
+# from typing import List   # create_projector
+from lib.projector import Projector
+from lib.bridge import TkAsyncBridge
+from lib.controller import Controller
+from lib.showfile import ShowFile, is_show_file
+from canvas_view import CanvasView
+
+
+class ProjectorFrame:
+    def __init__(self, projector: Projector, parent, remove_callback,
+                 bridge: TkAsyncBridge, controller: Controller,
+                 edit_callback=None) -> None:
+        self.projector = projector
+        self.grp = IntVar(value=1 if projector.group else 0)
+        self.remove_callback = remove_callback
+        # edit_callback(frame, 'position' | 'group') — для файла шоу
+        self.edit_callback = edit_callback
+        self.bridge = bridge
+        self.controller = controller
+
+        # Содержимое фрейма
+        self.frame = Frame(
+            parent,
+            borderwidth=1,
+            relief='solid',
+            background="#363537"
+        )
+        self.label = Label(
+            self.frame,
+            text=projector.label,
+            font=("Helvetica", 12, "bold"),
+            foreground="white",
+            background="#363537"
+        )
+        self.shutter_on_btn = Button(
+            self.frame,
+            text='Open',
+            command=self.wrapper_shutter_open,
+            bg="#04A777",
+            fg="white", width=5, highlightthickness=0
+        )
+        self.shutter_off_btn = Button(
+            self.frame,
+            text='Close',
+            command=self.wrapper_shutter_close,
+            bg="#DC758F",
+            fg="white", width=5, highlightthickness=0
+        )
+        self.group = Checkbutton(
+            self.frame,
+            text="Grp",
+            variable=self.grp,
+            command=self.toggle_group,
+            background="#363537",
+            highlightthickness=0
+        )
+        self.close_btn = Button(
+            self.frame, text='x', command=self.close_frame, bg="#F24333",
+            fg="white", width=1, height=1, highlightthickness=0
+        )
+        self.power_status = Label(
+            self.frame,
+            text="●",  # Circle character
+            font=("Arial", 10),
+            foreground="gray" if self.projector.power is None else (
+                "green" if self.projector.power else "red"),
+            background="#363537",  # Same as frame background
+            borderwidth=0,
+            padx=0,
+            pady=0
+        )
+
+        self.bg_status_color = self.get_screen_status_color()
+        self.screen_status = Label(
+            self.frame,
+            text=self.get_screen_status(),
+            background=self.bg_status_color,
+            foreground="white"
+        )
+        # Выпадающие списки для времени шаттера
+        self.shutter_in_menu = None
+        self.shutter_out_menu = None
+        self.update_shutter_time_menus()
+
+        # Расположение
+        self.label.grid(row=0, column=0, columnspan=2, pady=2)
+        self.group.grid(row=0, column=2, pady=2)
+        self.power_status.grid(row=0, column=0, pady=2)
+        self.close_btn.grid(row=0, column=3, pady=2, padx=2)
+        self.shutter_on_btn.grid(row=1, column=0, pady=2)
+        self.shutter_off_btn.grid(row=1, column=1, pady=2)
+        self.screen_status.grid(row=1, column=2, pady=2)
+
+        # Перетаскивание
+        self.frame.bind("<Button-1>", self.start_drag)
+        self.frame.bind("<B1-Motion>", self.do_drag)
+        self.frame.bind("<ButtonRelease-1>", self.end_drag)
+
+        self._drag_data = {"x": 0, "y": 0}
+
+    def update_shutter_time_menus(self):
+        # Списки создаются, как только время шаттера стало известно
+        if self.projector.shutter_in_time is not None:
+            if self.shutter_in_menu is None:
+                self.shutter_in_menu = ttk.Combobox(
+                    self.frame,
+                    values=self.projector.shutter_time_dict,
+                    state="readonly",
+                    width=5
+                )
+                self.shutter_in_menu.bind(
+                    "<<ComboboxSelected>>", self.set_shutter_in
+                )
+                self.shutter_in_menu.grid(row=2, column=0, pady=2)
+            self.shutter_in_menu.set(self.projector.shutter_in_time)
+
+        if self.projector.shutter_out_time is not None:
+            if self.shutter_out_menu is None:
+                self.shutter_out_menu = ttk.Combobox(
+                    self.frame,
+                    values=self.projector.shutter_time_dict,
+                    state="readonly",
+                    width=5
+                )
+                self.shutter_out_menu.bind(
+                    "<<ComboboxSelected>>", self.set_shutter_out
+                )
+                self.shutter_out_menu.grid(row=2, column=1, pady=2)
+            self.shutter_out_menu.set(self.projector.shutter_out_time)
+
+    def get_screen_status(self):
+        if self.projector.shutter is None:
+            return '?'
+        return f'{'Closed' if self.projector.shutter else 'Open'}'
+
+    def get_screen_status_color(self):
+        if self.projector.shutter is None:
+            return 'gray'
+        return 'red' if self.projector.shutter else 'green'
+
+    def toggle_group(self):
+        # Состояние группы хранится в проекторе, чтобы поток asyncio
+        # не читал переменные Tk
+        self.controller.set_group(self.projector, self.grp.get() == 1)
+        if self.edit_callback is not None:
+            self.edit_callback(self, 'group')
+
+    def show_error(self):
+        self.screen_status['background'] = '#000000'
+        self.screen_status['foreground'] = '#ffffff'
+        self.screen_status['text'] = 'Error'
+
+    def show_offline(self):
+        self.power_status['foreground'] = 'gray'
+        self.screen_status['background'] = '#000000'
+        self.screen_status['foreground'] = '#ffffff'
+        self.screen_status['text'] = 'Offline'
+
+    def wrapper_shutter_close(self):
+        self.bridge.submit(self.controller.shutter_close(self.projector))
+
+    def wrapper_shutter_open(self):
+        self.bridge.submit(self.controller.shutter_open(self.projector))
+
+    def set_shutter_in(self, event):
+        selected_time = self.shutter_in_menu.get()
+        try:
+            self.bridge.submit(self.projector.set_shutter_in(selected_time))
+        except Exception as e:
+            print(f"Error setting Shutter In Time: {e}")
+
+    def set_shutter_out(self, event):
+        selected_time = self.shutter_out_menu.get()
+        try:
+            self.bridge.submit(
+                self.projector.set_shutter_out(selected_time)
+            )
+        except Exception as e:
+            print(f"Error setting Shutter Out Time: {e}")
+
+    def close_frame(self):
+        self.frame.destroy()
+        self.remove_callback(self)
+
+    def start_drag(self, event):
+        self._drag_data["x"] = event.x
+        self._drag_data["y"] = event.y
+
+    def do_drag(self, event):
+        x = self.frame.winfo_x() - self._drag_data["x"] + event.x
+        y = self.frame.winfo_y() - self._drag_data["y"] + event.y
+        self.frame.place(x=x, y=y)
+
+    def position(self):
+        return self.frame.winfo_x(), self.frame.winfo_y()
+
+    def end_drag(self, event):
+        if self.edit_callback is not None:
+            self.edit_callback(self, 'position')
+
+    def update_power_status(self):
+        self.power_status['foreground'] = "gray" if (
+            self.projector.power is None) else (
+            "green" if self.projector.power else "red")
+
+    def update_screen_status(self):
+        self.screen_status['background'] = (
+            self.get_screen_status_color()
+        )
+        self.screen_status['text'] = self.get_screen_status()
+
+    def show_status_changes(self, changed, error=None):
+        if not self.frame.winfo_exists():
+            return  # Фрейм удалён, пока шла команда или опрос
+        if not self.projector.online:
+            self.show_offline()
+            return
+        if 'online' in changed:
+            self.update_power_status()
+            self.update_screen_status()
+        if error is not None:
+            self.show_error()
+            return
+        if 'power' in changed:
+            self.update_power_status()
+        if 'shutter' in changed:
+            self.update_screen_status()
+        if 'shutter_in_time' in changed or 'shutter_out_time' in changed:
+            self.update_shutter_time_menus()
+
+    def update_wrapper(self):
+        self.bridge.submit(self.controller.refresh([self.projector]))
+
+
+class MainFrame:
+    def __init__(self, controller=None, bridge=None,
+                 backend='frames') -> None:
+
+        # OSC и команды проекторам работают без интерфейса, окно только
+        # подписывается на изменения. app.py запускает их раньше окна
+        # и передаёт сюда уже работающими.
+        self.controller = controller or Controller()
+        self.controller.add_listener(self.on_projector_event)
+        self.dispatcher = self.controller.dispatcher
+        # Файл шоу: меняется по событиям, сохраняется с задержкой
+        self.show = ShowFile()
+        self._autosave_job = None
+
+        # Создание окна
+        self.root = Tk()
+        self.root.title("3P Shutter Control")
+        self.root.geometry("566x400")  # Размер окна по умолчанию
+        self.root.configure(background="#363537")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.bridge = bridge or TkAsyncBridge()
+        self.bridge.attach(self.root)
+
+        # Верхняя панель с кнопками
+        self.button_frame = Frame(self.root, background="#363537")
+        self.button_frame.pack(side='top', fill='x', padx=5, pady=5)
+
+        # Кнопки
+        self.all_shutter_on_btn = Button(
+            self.button_frame,
+            text='Open Group',
+            command=self.opn_async_grp_shtr,
+            bg="#04A777",
+            fg="white",
+            highlightthickness=0
+        )
+        self.all_shutter_off_btn = Button(
+            self.button_frame,
+            text='Close Group',
+            command=self.cls_async_grp_shtr,
+            bg="#DC758F",
+            fg="white",
+            highlightthickness=0
+        )
+        self.update_btn = Button(
+            self.button_frame,
+            text='Update',
+            command=self.wrapper_update,
+            bg="#FFDBB5",
+            fg="black",
+            width=10,
+            highlightthickness=0
+        )
+        self.add_projector_btn = Button(
+            self.button_frame,
+            text='Add Projector',
+            command=self.open_add_projector_window,
+            bg="#71A9F7",
+            fg="white",
+            width=12,
+            highlightthickness=0
+        )
+        self.load_projectors_btn = Button(
+            self.button_frame,
+            text='Load from File',
+            command=self.wrapper_load_projectors,
+            bg="#729B79",
+            fg="white",
+            width=15,
+            highlightthickness=0
+        )
+        self.save_projectors_btn = Button(
+            self.button_frame,
+            text='Save to File',
+            command=self.save_projectors_to_file,
+            bg="#14453D",
+            fg="white",
+            width=15,
+            highlightthickness=0
+        )
+
+        self.power_on_all_btn = Button(
+            self.button_frame,
+            text='On All',
+            command=self.power_on_all_projectors,
+            bg="#5D9C59",  # Green color
+            fg="white",
+            width=7,
+            highlightthickness=0
+        )
+        self.power_off_all_btn = Button(
+            self.button_frame,
+            text='Off All',
+            command=self.power_off_all_projectors,
+            bg="#DF2E38",  # Red color
+            fg="white",
+            width=7,
+            highlightthickness=0
+        )
+
+        # Расположение кнопок
+        self.all_shutter_on_btn.grid(
+            row=1, column=0,
+            ipadx=7, ipady=7,
+            pady=10
+        )
+        self.all_shutter_off_btn.grid(
+            row=1, column=1, ipadx=7, ipady=7, pady=10
+        )
+        self.update_btn.grid(row=1, column=2, padx=5, pady=10)
+
+        self.add_projector_btn.grid(row=0, column=0, padx=5, pady=2)
+        self.load_projectors_btn.grid(row=0, column=1, padx=5, pady=2)
+        self.save_projectors_btn.grid(row=0, column=2, padx=5, pady=2)
+
+        self.power_on_all_btn.grid(row=0, column=3, padx=5, pady=2)
+        self.power_off_all_btn.grid(row=1, column=3, padx=5, pady=2)
+
+        # Область для перемещения фреймов проекторов
+        self.canvas = Frame(
+            self.root,
+            borderwidth=2,
+            relief='sunken',
+            background="#938BA1"
+        )
+        self.canvas.pack(side='top', fill='both', expand=True, padx=5, pady=5)
+
+        # backend='canvas' — все проекторы рисуются на одном Canvas,
+        # для больших шоу (100+ проекторов)
+        self.view = None
+        if backend == 'canvas':
+            self.view = CanvasView(
+                self.canvas, self.bridge, self.controller,
+                self.remove_frame, self.on_frame_edit
+            )
+
+        # Вспомогательные переменные
+        self.active_frame = []
+        self.frame_of = {}
+
+    def on_projector_event(self, projector, changed, error=None):
+        # Вызывается в потоке asyncio
+        self.bridge.call(self.show_projector_event, projector, changed, error)
+
+    def show_projector_event(self, projector, changed, error=None):
+        frame = self.frame_of.get(projector)
+        if frame is not None:
+            frame.show_status_changes(changed, error)
+        self.show.update(projector, changed)
+        self.schedule_autosave()
+
+    def on_frame_edit(self, frame, what):
+        if what == 'position':
+            self.show.move(frame.projector, *frame.position())
+        else:
+            self.show.update(frame.projector, [what])
+        self.schedule_autosave()
+
+    def schedule_autosave(self):
+        if self.show.path is None or self._autosave_job is not None:
+            return
+        if self.show.dirty:
+            self._autosave_job = self.root.after(2000, self.autosave)
+
+    def autosave(self):
+        self._autosave_job = None
+        try:
+            self.show.save()
+        except OSError as e:
+            print(f"Error while saving show: {e}")
+
+    def cls_async_grp_shtr(self):
+        self.bridge.submit(self.controller.close_group_shutter())
+
+    def opn_async_grp_shtr(self):
+        self.bridge.submit(self.controller.open_group_shutter())
+
+    def wrapper_update(self):
+        self.bridge.submit(self.controller.refresh())
+
+    def power_on_all_projectors(self):
+        self.bridge.submit(self.controller.power_on_all())
+
+    def power_off_all_projectors(self):
+        self.bridge.submit(self.controller.power_off_all())
+
+    def on_close(self):
+        # Здесь можно добавить логику завершения или очистки
+        print("Закрытие MainFrame...")
+        self.root.destroy()
+
+    def load_projectors_from_file(self):
+        """
+        Загружает проекторы, их координаты и размер окна из файла шоу
+        (JSON) или старого CSV.
+        """
+        file_path = filedialog.askopenfilename(
+            title="Select Projectors File",
+            filetypes=(
+                ("Show Files", "*.json"),
+                ("Text Files", "*.txt"),
+                ("All Files", "*.*"),
+            )
+        )
+
+        if not file_path:
+            print("No file selected.")
+            return
+        self.load_show(file_path)
+
+    def load_show(self, file_path):
+        try:
+            projectors = self.show.load(
+                file_path, first_id=self.controller.projectors.next_id()
+            )
+        except Exception as e:
+            print(f"Error while loading projectors: {e}")
+            return
+
+        if self.show.size is not None:
+            width, height = self.show.size
+            self.root.geometry(f"{width}x{height}")
+        print("Window size loaded successfully.")
+
+        # Фреймы сразу показывают последнее сохранённое состояние,
+        # опрос проекторов уточняет его в фоне
+        added = [projector for projector, x, y in projectors
+                 if self.add_frame(projector, x, y) is not None]
+        self.controller.set_scenes(self.show.scenes)
+        if added:
+            self.bridge.submit(self.controller.refresh(added, "Load"))
+
+    def wrapper_load_projectors(self):
+        self.load_projectors_from_file()
+
+    def save_projectors_to_file(self):
+        """
+        Сохраняет активные проекторы, их координаты и размер окна в файл.
+        """
+        file_path = filedialog.asksaveasfilename(
+            title="Save Projectors File",
+            defaultextension=".json",
+            filetypes=(
+                ("Show Files", "*.json"),
+                ("Text Files", "*.txt"),
+                ("All Files", "*.*"),
+            )
+        )
+
+        if not file_path:
+            print("No file selected for saving.")
+            return
+
+        if is_show_file(file_path):
+            self.show.size = (
+                self.root.winfo_width(), self.root.winfo_height()
+            )
+            self.show.dirty = True
+            try:
+                self.show.save(file_path)
+            except Exception as e:
+                print(f"Error while saving show: {e}")
+            else:
+                print(f"Show saved successfully to {file_path}.")
+            return
+
+        # Старый формат CSV
+        try:
+            with open(file_path, "w") as file:
+                # Сохраняем размер окна
+                width = self.root.winfo_width()
+                height = self.root.winfo_height()
+                file.write(f"{width},{height}\n")
+
+                # Сохраняем данные проекторов
+                for frame in self.active_frame:
+                    projector = frame.projector
+                    x, y = frame.position()
+                    # Сохраняем данные проектора и координаты в формате:
+                    # IP,PORT,USERNAME,PASSWORD,LABEL,X,Y
+                    file.write(
+                        f"{projector.ip},{projector.port},{projector.login},"
+                        f"{projector.password},{projector.label},{x},{y}\n"
+                    )
+            print(
+                (
+                    f"Projectors, positions, and window size"
+                    f"saved successfully to {file_path}."
+                )
+            )
+        except Exception as e:
+            print(f"Error while saving projectors: {e}")
+
+    def open_add_projector_window(self):
+        # Создание нового окна
+        add_window = Toplevel(self.root)
+        add_window.title("Add Projector")
+        add_window.geometry("300x250")
+
+        # Поля для ввода параметров
+        Label(
+            add_window, text="IP Address:"
+        ).grid(row=0, column=0, padx=10, pady=5, sticky="w")
+        ip_entry = Entry(add_window)
+        ip_entry.grid(row=0, column=1, padx=10, pady=5)
+
+        Label(
+            add_window, text="Port:"
+        ).grid(row=1, column=0, padx=10, pady=5, sticky="w")
+        port_entry = Entry(add_window)
+        port_entry.grid(row=1, column=1, padx=10, pady=5)
+
+        Label(
+            add_window, text="Username:"
+        ).grid(row=2, column=0, padx=10, pady=5, sticky="w")
+        username_entry = Entry(add_window)
+        username_entry.grid(
+            row=2, column=1, padx=10, pady=5
+        )
+        Label(
+            add_window, text="Password:"
+        ).grid(row=3, column=0, padx=10, pady=5, sticky="w")
+        password_entry = Entry(add_window, show="*")
+        password_entry.grid(
+            row=3, column=1, padx=10, pady=5
+        )
+
+        Label(
+            add_window, text="Label:"
+        ).grid(row=4, column=0, padx=10, pady=5, sticky="w")
+        label_entry = Entry(add_window)
+        label_entry.grid(row=4, column=1, padx=10, pady=5)
+
+        # Кнопка для добавления проектора
+        async def async_add_projector(new_projector):
+            await new_projector.get_info()
+            self.bridge.call(place_projector, new_projector)
+
+        def place_projector(new_projector):
+            # Проверка на существование проекторов с таким же адресом
+            if self.controller.projectors.by_address(
+                    new_projector.ip, new_projector.port) is not None:
+                print(f"{new_projector.ip} already exists.")
+                # Сессия, открытая get_info, больше не нужна
+                self.bridge.loop.call_soon_threadsafe(new_projector.close)
+                return
+            # Расположение нового фрейма
+            x_offset = 10 + (len(self.active_frame) % 2) * 250
+            y_offset = 10 + (len(self.active_frame) // 2) * 100
+            self.add_frame(new_projector, x_offset, y_offset)
+
+            # Закрытие окна после добавления
+            add_window.destroy()
+
+        def add_projector():
+            ip = ip_entry.get()
+            port = int(port_entry.get())
+            username = username_entry.get()
+            password = password_entry.get()
+            label = label_entry.get()
+
+            # Создание нового проектора
+            new_projector = Projector(
+                ip=ip,
+                port=port,
+                login=username,
+                password=password,
+                label=label,
+                id=self.controller.projectors.next_id(),
+            )
+            self.bridge.submit(async_add_projector(new_projector))
+
+        add_button = Button(add_window, text="Add", command=add_projector)
+        add_button.grid(row=5, column=0, columnspan=2, pady=10)
+
+    def add_frame(self, projector, x, y):
+        if not self.controller.add(projector):
+            # Дубликат: из документа шоу тоже убираем; сессии и задачи
+            # проектора закрываются в потоке asyncio
+            self.show.remove(projector)
+            self.bridge.loop.call_soon_threadsafe(projector.close)
+            return None
+        if self.view is not None:
+            frame = self.view.add(projector, x, y)
+        else:
+            frame = ProjectorFrame(
+                projector, self.canvas, self.remove_frame,
+                self.bridge, self.controller, self.on_frame_edit
+            )
+            frame.frame.place(x=x, y=y)
+        self.active_frame.append(frame)
+        self.frame_of[projector] = frame
+        self.show.add(projector, x, y)
+        self.schedule_autosave()
+        return frame
+
+    def add_frames(self, projectors):
+        x_offset = 10  # Начальный отступ по X
+        y_offset = 10  # Начальный отступ по Y
+        step_x = 250   # Шаг между фреймами по X
+        step_y = 100   # Шаг между фреймами по Y
+        max_columns = 2  # Максимальное количество фреймов в строке
+        for index, projector in enumerate(projectors):
+            x = x_offset + (index % max_columns) * step_x
+            y = y_offset + (index // max_columns) * step_y
+            self.add_frame(projector, x, y)
+
+    def remove_frame(self, frame):
+        if frame in self.active_frame:
+            self.active_frame.remove(frame)
+            self.frame_of.pop(frame.projector, None)
+            self.controller.remove(frame.projector)
+            self.show.remove(frame.projector)
+            self.schedule_autosave()
+            self.bridge.loop.call_soon_threadsafe(frame.projector.close)
+
+    def run(self):
+        # asyncio работает в своём потоке, Tk — в главном, без опроса
+        self.bridge.start()
+        if self.controller.transport is None:
+            self.bridge.submit(self.controller.start())
+        self.root.after(0, self.bridge.start_waker)
+        try:
+            self.root.mainloop()
+        finally:
+            try:
+                self.show.save()
+            except OSError as e:
+                print(f"Error while saving show: {e}")
+            try:
+                self.bridge.submit(self.controller.stop()).result(timeout=2)
+            except Exception as e:
+                print(f"Error while stopping server: {e}")
+            self.bridge.stop()
+
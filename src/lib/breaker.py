@@ -0,0 +1,73 @@
+import asyncio
+
+
+class Offline(ConnectionError):
+    """
+    Проектор считается недоступным, команда не отправлялась.
+    """
+
+
+class CircuitBreaker:
+    """
+    Учёт доступности одного проектора.
+
+    После threshold сбоев подряд команды сразу получают Offline, а
+    проектор проверяется в фоне через probe() с паузами от base_delay
+    до max_delay (удваивая). Первая удачная проверка или команда снова
+    открывает доступ. on_change(online) вызывается при каждой смене
+    состояния.
+    """
+
+    def __init__(self, name, threshold=3, base_delay=1.0, max_delay=30.0,
+                 on_change=None) -> None:
+        self.name = name
+        self.threshold = threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.on_change = on_change
+        self.online = True
+        self.failures = 0
+        self.rejected = 0
+        self._probe_task = None
+
+    def check(self):
+        if not self.online:
+            self.rejected += 1
+            raise Offline(f"{self.name} is offline")
+
+    def success(self):
+        self.failures = 0
+        if not self.online:
+            self.online = True
+            print(f"{self.name} is back online")
+            if self.on_change is not None:
+                self.on_change(True)
+
+    def failure(self, probe=None):
+        self.failures += 1
+        if self.online and self.failures >= self.threshold:
+            self.online = False
+            print(f"{self.name} is offline after {self.failures} failures")
+            if probe is not None and self._probe_task is None:
+                self._probe_task = asyncio.create_task(self._probe(probe))
+            if self.on_change is not None:
+                self.on_change(False)
+
+    async def _probe(self, probe):
+        delay = self.base_delay
+        try:
+            while not self.online:
+                await asyncio.sleep(delay)
+                try:
+                    await probe()
+                except Exception:
+                    delay = min(delay * 2, self.max_delay)
+                else:
+                    self.success()
+        finally:
+            self._probe_task = None
+
+    def stop(self):
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            self._probe_task = None
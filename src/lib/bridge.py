@@ -0,0 +1,116 @@
+import asyncio
+import queue
+import threading
+import time
+
+
+class TkAsyncBridge:
+    """
+    Связка Tk и asyncio без периодического опроса.
+
+    Цикл asyncio (OSC и команды проекторам) работает в отдельном
+    потоке, Tk — в главном потоке в обычном mainloop. Из Tk корутины
+    отправляются через submit(), из asyncio изменения интерфейса
+    передаются через call(): вызовы складываются в очередь, а отдельный
+    поток-будильник генерирует виртуальное событие, по которому Tk
+    выполняет накопившиеся вызовы. Поток asyncio при этом никогда не
+    ждёт Tk.
+
+    Цикл можно запустить до создания окна (root=None), чтобы OSC
+    работал, пока строится интерфейс; окно подключается через
+    attach(root). Будильник запускается через start_waker() уже из
+    mainloop (root.after(0, ...)): до mainloop event_generate из
+    другого потока падает с RuntimeError. Накопившиеся к этому моменту
+    вызовы выполнятся сразу.
+    """
+
+    EVENT = '<<AsyncBridge>>'
+
+    def __init__(self, root=None) -> None:
+        self.root = None
+        self.loop = asyncio.new_event_loop()
+        self._calls = queue.SimpleQueue()
+        self._wake = threading.Event()
+        self._closed = False
+        self._loop_thread = threading.Thread(
+            target=self._run_loop, name='asyncio', daemon=True
+        )
+        self._waker_thread = threading.Thread(
+            target=self._run_waker, name='tk-waker', daemon=True
+        )
+        if root is not None:
+            self.attach(root)
+
+    def attach(self, root):
+        self.root = root
+        self.root.bind(self.EVENT, self._drain)
+
+    def start(self):
+        if self._loop_thread.is_alive():
+            return
+        self._loop_thread.start()
+
+    def start_waker(self):
+        """
+        Запускает поток-будильник; вызывать из mainloop.
+        """
+        if self._waker_thread.ident is not None or self._closed:
+            return
+        self._waker_thread.start()
+        self._wake.set()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def _run_waker(self):
+        reported = False
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._closed:
+                return
+            try:
+                self.root.event_generate(self.EVENT, when='tail')
+            except RuntimeError as e:
+                # Главный поток не в mainloop: вызовы ждут в очереди,
+                # будильник пробует снова
+                if not reported:
+                    print(f"Bridge waker: {e}, retrying")
+                    reported = True
+                time.sleep(0.05)
+                self._wake.set()
+                continue
+            except Exception:
+                return  # Окно уже закрыто
+            reported = False
+
+    def _drain(self, event=None):
+        while True:
+            try:
+                fn, args = self._calls.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"UI callback error: {e}")
+
+    def submit(self, coro):
+        """
+        Запускает корутину в потоке asyncio (можно вызывать из Tk).
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call(self, fn, *args):
+        """
+        Выполняет fn(*args) в потоке Tk (можно вызывать из asyncio).
+        """
+        self._calls.put((fn, args))
+        self._wake.set()
+
+    def stop(self):
+        self._closed = True
+        self._wake.set()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._loop_thread.join(timeout=2)
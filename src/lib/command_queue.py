@@ -0,0 +1,89 @@
+import asyncio
+import collections
+
+
+def command_kind(cmd):
+    """
+    Вид команды для схлопывания: 'OSH:0' -> 'shutter', 'PON' -> 'power',
+    'VXX:SEFS1=2.0' -> 'SEFS1'. Для остальных команд None.
+    """
+    if cmd.startswith('OSH:'):
+        return 'shutter'
+    if cmd in ('PON', 'POF'):
+        return 'power'
+    if cmd.startswith('VXX:SEFS'):
+        return cmd[4:].split('=', 1)[0]
+    return None
+
+
+class CommandQueue:
+    """
+    Очередь команд одного проектора: команды уходят строго по одной.
+
+    Если команда ещё ждёт отправки, а пришла новая того же вида (шаттер,
+    питание, время SEFS), старая выбрасывается и отправляется только
+    последняя. Все, кто ждал выброшенную команду, получают ответ новой.
+    send — корутина send(cmd), выполняющая команду.
+    """
+
+    def __init__(self, send) -> None:
+        self._send = send
+        self._pending = collections.OrderedDict()
+        self._worker = None
+        self.sent = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def submit(self, cmd):
+        """
+        Ставит команду в очередь, возвращает future с ответом.
+        """
+        future = asyncio.get_running_loop().create_future()
+        kind = command_kind(cmd)
+        key = kind if kind is not None else object()
+        futures = [future]
+        if key in self._pending:
+            _, waiting = self._pending.pop(key)
+            futures = waiting + futures
+            self.coalesced += 1
+        self._pending[key] = (cmd, futures)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        return future
+
+    def pending(self, kind):
+        """
+        Ждущая отправки команда вида kind или None.
+        """
+        entry = self._pending.get(kind)
+        return None if entry is None else entry[0]
+
+    def drop(self, kind):
+        """
+        Убирает ждущую команду вида kind (например, перед групповым
+        запуском шаттеров). Ждавшие её получают 'Superseded'.
+        """
+        entry = self._pending.pop(kind, None)
+        if entry is None:
+            return
+        self.coalesced += 1
+        for future in entry[1]:
+            if not future.done():
+                future.set_result('Superseded')
+
+    async def _run(self):
+        while self._pending:
+            key, (cmd, futures) = self._pending.popitem(last=False)
+            try:
+                answer = await self._send(cmd)
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for future in futures:
+                    if not future.done():
+                        future.set_result(answer)
+            self.sent += 1
@@ -0,0 +1,417 @@
+import asyncio
+
+from pythonosc.dispatcher import Dispatcher
+
+from lib.breaker import Offline
+from lib.projector import Projector
+from lib.fleet import run_bounded
+from lib.ingress import Ingress
+from lib.metrics import METRICS
+from lib.ntcontrol import ErrorReply
+from lib.oscserver import OSCProtocol
+from lib.poller import FIELDS, StatusPoller
+from lib.pool import Preempted
+from lib.recorder import Recorder
+from lib.relay import fire_split
+from lib.registry import ProjectorRegistry
+from lib.routing import RouteTable
+from lib.scenes import Scene, read_scenes_file
+from lib.scheduler import CueScheduler
+
+
+SCENE_SHUTTER = {
+    'OSH:0': Projector.SHUTTER_OPEN,
+    'OSH:1': Projector.SHUTER_CLOSED,
+}
+
+
+class Controller:
+    """
+    Управление проекторами без интерфейса: OSC-маршруты, групповые
+    команды, опрос состояния.
+
+    Интерфейс (если есть) подписывается через add_listener и получает
+    listener(projector, changed, error) после каждой команды или опроса.
+    Подписчики add_probe_listener получают listener(projector, error)
+    только по результатам опроса (refresh и фоновый).
+    Методы вызываются в потоке asyncio, add/remove — из любого потока.
+    """
+
+    def __init__(self, host='127.0.0.1', port=7001) -> None:
+        self.host = host
+        self.port = port
+        self.projectors = ProjectorRegistry()
+        self.routes = RouteTable(self.projectors)
+        self.scenes = {}
+        self.listeners = []
+        self.probe_listeners = []
+        self.transport = None
+
+        self.refresh_limit = 16     # Одновременно опрашиваемых проекторов
+        self.refresh_deadline = 5   # Секунд на обновление одного проектора
+        self.sync_group_fire = True  # Синхронный запуск шаттеров группы
+        self.metrics = METRICS
+        self.metrics_interval = 60  # Период вывода метрик, сек.
+        self.metrics_file = None    # Файл для метрик (иначе в консоль)
+        self._metrics_task = None
+        # Сообщения OSC bundle с будущим временем
+        self.scheduler = CueScheduler()
+        # Очередь OSC-команд: повторы и устаревшие намерения отбрасываются
+        self.ingress = Ingress(self.intent_of)
+        # Журнал OSC и команд (record), по умолчанию выключен
+        self.recorder = None
+
+        self.dispatcher = Dispatcher()
+        self.dispatcher.map(
+            "/shutter/open*",
+            self.shutter_open_handler
+            )
+        self.dispatcher.map(
+            "/shutter/close*",
+            self.shutter_close_handler
+            )
+        self.dispatcher.map(
+            "/shutter/group/open",
+            self.shutter_group_open_handler
+            )
+        self.dispatcher.map(
+            "/shutter/group/close",
+            self.shutter_group_close_handler
+            )
+        self.dispatcher.map(
+            "/scene/*",
+            self.scene_handler
+            )
+        self.dispatcher.map(
+            "/metrics",
+            self.metrics.query_handler
+            )
+
+        # Фоновый опрос состояния, подписчики получают только изменения
+        self.poller = StatusPoller(
+            lambda: self.projectors,
+            self.notify,
+            projector_of=lambda projector: projector,
+            on_probe=lambda projector, ok: self._probed(
+                projector, None if ok else ConnectionError(
+                    f"{projector.ip} is unreachable")),
+        )
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def add_probe_listener(self, listener):
+        self.probe_listeners.append(listener)
+
+    def notify(self, projector, changed, error=None):
+        for listener in self.listeners:
+            listener(projector, changed, error)
+
+    def _probed(self, projector, error=None):
+        for listener in self.probe_listeners:
+            listener(projector, error)
+
+    def _online_changed(self, projector, online):
+        self.notify(projector, ['online'])
+        if online:
+            # Проектор вернулся — перечитываем его состояние
+            asyncio.create_task(self.refresh([projector], "Online"))
+
+    def add(self, projector):
+        """
+        False, если проектор с таким IP и портом уже добавлен.
+        """
+        if not self.projectors.add(projector):
+            return False
+        projector.pool.breaker.on_change = (
+            lambda online: self._online_changed(projector, online)
+        )
+        projector.pool.recorder = self.recorder
+        self._rebuild()
+        return True
+
+    def remove(self, projector):
+        if self.projectors.remove(projector):
+            self._rebuild()
+
+    def _rebuild(self):
+        # Сцены ссылаются на проекторы напрямую — пересобираем их
+        for scene in self.scenes.values():
+            scene.compile(self.routes)
+
+    def load_scenes(self, file_path):
+        self.set_scenes(read_scenes_file(file_path))
+
+    def set_scenes(self, scenes):
+        """
+        scenes — {имя: [(selector, cmd), ...]}.
+        """
+        self.scenes = {
+            name: Scene(name, steps).compile(self.routes)
+            for name, steps in scenes.items()
+        }
+        for scene in self.scenes.values():
+            if scene.missing:
+                missing = ', '.join(scene.missing)
+                print(f"Scene {scene.name}: no projectors for {missing}")
+        print(f"Scenes loaded: {', '.join(self.scenes) or '-'}")
+
+    def record(self, file_path):
+        """
+        Включает запись входящих OSC и команд проекторам в файл (до
+        start()).
+        """
+        self.recorder = Recorder(file_path)
+        for projector in self.projectors:
+            projector.pool.recorder = self.recorder
+        print(f"Recording traffic to {file_path}")
+
+    async def shutter_open(self, projector, force=False):
+        try:
+            await projector.shutter_open(force)
+        except Offline as e:
+            self.notify(projector, ['shutter'], e)
+        except TimeoutError as e:
+            print("Error: Timeout while opening shutter")
+            self.notify(projector, ['shutter'], e)
+        else:
+            self.notify(projector, ['shutter'])
+
+    async def shutter_close(self, projector, force=False):
+        try:
+            await projector.shutter_close(force)
+        except Offline as e:
+            self.notify(projector, ['shutter'], e)
+        except TimeoutError as e:
+            print("Error: Timeout while closing shutter")
+            self.notify(projector, ['shutter'], e)
+        else:
+            self.notify(projector, ['shutter'])
+
+    async def power_on(self, projector):
+        try:
+            await projector.power_on()
+        except Offline as e:
+            self.notify(projector, ['power'], e)
+        except Exception as e:
+            print(f"Error powering on projector {projector.label}: {e}")
+        else:
+            self.notify(projector, ['power'])
+
+    async def power_off(self, projector):
+        try:
+            await projector.power_off()
+        except Offline as e:
+            self.notify(projector, ['power'], e)
+        except Exception as e:
+            print(f"Error powering off projector {projector.label}: {e}")
+        else:
+            self.notify(projector, ['power'])
+
+    async def fire(self, projectors, action):
+        await asyncio.gather(
+            *(action(projector) for projector in projectors)
+        )
+
+    # Обработчики OSC возвращают корутину команды, её выполняет Ingress
+
+    def shutter_open_handler(self, address, *args):
+        if args[0] == 3:
+            projectors = self.routes.resolve(address.split('/')[-1])
+            if projectors:
+                return self.fire(projectors, self.shutter_open)
+
+    def shutter_close_handler(self, address, *args):
+        if args[0] == 3:
+            projectors = self.routes.resolve(address.split('/')[-1])
+            if projectors:
+                return self.fire(projectors, self.shutter_close)
+
+    def group(self):
+        return self.projectors.group()
+
+    def set_group(self, projector, value):
+        self.projectors.set_group(projector, value)
+
+    async def fire_group(self, cmd, shutter, group=None):
+        # Команда уходит на все проекторы группы одновременно по заранее
+        # открытым сессиям с поправкой на время ответа каждого
+        if group is None:
+            group = self.group()
+        projectors = []
+        for projector in group:
+            # Ждущая одиночная команда шаттера старше групповой
+            projector.queue.drop('shutter')
+            if not projector.known('shutter', shutter):
+                projectors.append(projector)
+        if not projectors:
+            return
+        report = await fire_split(projectors, cmd)
+        print(f"Group fire: {report.summary()}")
+        for projector in projectors:
+            answer = report.answers.get(projector)
+            if isinstance(answer, Exception):
+                print(f"Error: {projector.label}: {answer}")
+                self.notify(projector, ['shutter'], answer)
+            elif answer == 'Timeout' or isinstance(answer, ErrorReply):
+                projector.shutter = shutter
+                projector.updated_at['shutter'] = None
+                self.notify(projector, ['shutter'])
+            else:
+                projector.confirm('shutter', shutter)
+                self.notify(projector, ['shutter'])
+
+    async def close_group_shutter(self):
+        if self.sync_group_fire:
+            await self.fire_group('OSH:1', Projector.SHUTER_CLOSED)
+        else:
+            await self.fire(self.group(), self.shutter_close)
+
+    async def open_group_shutter(self):
+        if self.sync_group_fire:
+            await self.fire_group('OSH:0', Projector.SHUTTER_OPEN)
+        else:
+            await self.fire(self.group(), self.shutter_open)
+
+    def shutter_group_open_handler(self, address, *args):
+        if args[0] == 3:
+            return self.open_group_shutter()
+
+    def shutter_group_close_handler(self, address, *args):
+        if args[0] == 3:
+            return self.close_group_shutter()
+
+    async def command(self, projector, cmd):
+        field, value = projector.effect(cmd)
+        try:
+            await projector.submit(cmd)
+        except Offline as e:
+            self.notify(projector, [field], e)
+        except Exception as e:
+            print(f"Error: {projector.label}: {cmd}: {e}")
+            self.notify(projector, [field], e)
+        else:
+            self.notify(projector, [field])
+
+    async def fire_scene(self, name):
+        scene = self.scenes.get(name)
+        if scene is None:
+            print(f"Unknown scene: {name}")
+            return
+        await asyncio.gather(
+            *(self.fire_group(cmd, SCENE_SHUTTER[cmd], projectors)
+              for cmd, projectors in scene.shutter.items()),
+            *(self.command(projector, cmd)
+              for projector, cmd in scene.commands)
+        )
+
+    def scene_handler(self, address, *args):
+        if args[0] == 3:
+            return self.fire_scene(address.split('/', 2)[2])
+
+    @staticmethod
+    def intent_of(address, params):
+        """
+        Цель OSC-сообщения для Ingress: /shutter/open/13 и
+        /shutter/close/13 — одно намерение ('shutter', '13'), из двух
+        ждущих выполняется только последнее. None — без замены.
+        """
+        if params[:1] != [3]:
+            return None
+        parts = address.split('/')
+        if len(parts) == 4 and parts[1] == 'shutter':
+            if parts[2] == 'group':
+                return ('shutter', 'group')
+            return ('shutter', parts[3])
+        return None
+
+    def targets(self, address):
+        """
+        Проекторы, которых коснётся OSC-сообщение address.
+        """
+        parts = address.split('/')
+        if address.startswith('/scene/'):
+            scene = self.scenes.get(address.split('/', 2)[2])
+            if scene is None:
+                return []
+            projectors = [projector for projector, cmd in scene.commands]
+            for group in scene.shutter.values():
+                projectors.extend(group)
+            return projectors
+        if address.startswith('/shutter/group/'):
+            return self.group()
+        if address.startswith('/shutter/') and len(parts) > 3:
+            return list(self.routes.resolve(parts[-1]))
+        return []
+
+    async def prearm(self, address):
+        # Открываем сессии заранее, чтобы команда ушла без подключения
+        await asyncio.gather(
+            *(projector.pool.warm() for projector in self.targets(address)
+              if projector.online),
+            return_exceptions=True
+        )
+
+    async def _probe(self, projector):
+        try:
+            ok = await projector.get_info()
+        except Preempted:
+            # Опрос уступил управляющей команде, повторяем после неё
+            ok = await projector.get_info()
+        if ok is False:
+            raise ConnectionError(f"{projector.ip} is unreachable")
+
+    def _refreshed(self, projector, error):
+        if error is not None:
+            print(f"Error updating projector {projector.label}: {error}")
+        self.notify(projector, list(FIELDS), error)
+        self._probed(projector, error)
+
+    async def refresh(self, projectors=None, title="Update"):
+        # Опрос проекторов параллельно, не больше refresh_limit
+        # одновременно; подписчики получают результат сразу по готовности
+        if projectors is None:
+            projectors = self.projectors
+        report = await run_bounded(
+            list(projectors),
+            self._probe,
+            limit=self.refresh_limit,
+            deadline=self.refresh_deadline,
+            on_result=self._refreshed,
+            name=lambda projector: projector.label,
+        )
+        print(f"{title}: {report.summary()}")
+        return report
+
+    async def power_on_all(self):
+        await self.fire(list(self.projectors), self.power_on)
+
+    async def power_off_all(self):
+        await self.fire(list(self.projectors), self.power_off)
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.transport, protocol = await loop.create_datagram_endpoint(
+            lambda: OSCProtocol(self.dispatcher, self.scheduler,
+                                self.prearm, self.ingress, self.recorder),
+            local_addr=(self.host, self.port)
+        )
+        self.poller.start()
+        if self.metrics_interval:
+            self._metrics_task = asyncio.create_task(self.metrics.report(
+                self.metrics_interval, self.metrics_file
+            ))
+
+    async def stop(self):
+        self.poller.stop()
+        self.scheduler.cancel()
+        if self._metrics_task is not None:
+            self._metrics_task.cancel()
+            self._metrics_task = None
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+        for projector in self.projectors:
+            projector.close()
+        if self.recorder is not None:
+            self.recorder.close()
@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+
+class FleetReport:
+    def __init__(self) -> None:
+        self.wall_time = 0.0
+        self.durations = {}
+        self.errors = {}
+
+    def add(self, name, duration, error=None):
+        self.durations[name] = duration
+        if error is not None:
+            self.errors[name] = error
+
+    def slowest(self, count=3):
+        return sorted(
+            self.durations.items(), key=lambda item: item[1], reverse=True
+        )[:count]
+
+    def summary(self):
+        slowest = ', '.join(
+            f'{name} {duration:.2f}s' for name, duration in self.slowest()
+        )
+        return (
+            f'{len(self.durations)} projectors in {self.wall_time:.2f}s, '
+            f'{len(self.errors)} failed; slowest: {slowest or "-"}'
+        )
+
+
+async def run_bounded(items, worker, limit=16, deadline=5.0,
+                      on_result=None, name=str):
+    """
+    Запускает worker(item) для всех items, не больше limit одновременно.
+
+    Каждый вызов ограничен deadline секундами. on_result(item, error)
+    вызывается сразу по завершении каждого элемента (error — None при
+    успехе), не дожидаясь остальных.
+    """
+    slots = asyncio.Semaphore(limit)
+    report = FleetReport()
+    started = time.monotonic()
+
+    async def run_one(item):
+        async with slots:
+            item_started = time.monotonic()
+            error = None
+            try:
+                await asyncio.wait_for(worker(item), deadline)
+            except asyncio.TimeoutError:
+                error = asyncio.TimeoutError(
+                    f'Deadline {deadline}s exceeded')
+            except Exception as e:
+                error = e
+            report.add(name(item), time.monotonic() - item_started, error)
+        if on_result is not None:
+            on_result(item, error)
+
+    await asyncio.gather(*(run_one(item) for item in items))
+    report.wall_time = time.monotonic() - started
+    return report
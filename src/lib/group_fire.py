@@ -0,0 +1,133 @@
+import asyncio
+import time
+
+
+class FireReport:
+    def __init__(self, cmd) -> None:
+        self.cmd = cmd
+        self.answers = {}
+        self.lateness = {}
+        self.arrivals = {}
+        self.fire_at = None  # Расчётный момент прихода, time.monotonic()
+
+    @property
+    def spread(self):
+        """
+        Разброс расчётного времени прихода команды на проекторы, сек.
+        """
+        if not self.arrivals:
+            return 0.0
+        return max(self.arrivals.values()) - min(self.arrivals.values())
+
+    def summary(self):
+        failed = sum(
+            1 for answer in self.answers.values()
+            if isinstance(answer, Exception)
+        )
+        late = max(self.lateness.values(), default=0.0)
+        return (
+            f'{self.cmd} to {len(self.answers)} projectors, '
+            f'{failed} failed, spread {self.spread * 1000:.1f} ms, '
+            f'max late {late * 1000:.1f} ms'
+        )
+
+
+class GroupFire:
+    """
+    Синхронный запуск одной команды на группе проекторов.
+
+    arm() заранее открывает и авторизует сессии и замеряет время ответа
+    там, где оно ещё неизвестно. fire() отправляет команду так, чтобы
+    она пришла на все проекторы в один момент: проекторы с большим
+    временем ответа получают её раньше на половину своего RTT.
+    """
+
+    def __init__(self, projectors, margin=0.005, timeout=2) -> None:
+        self.projectors = list(projectors)
+        self.margin = margin
+        self.timeout = timeout
+        self._armed = {}
+        self._errors = {}
+
+    async def _arm_one(self, projector):
+        session, reused = await projector.pool.acquire(self.timeout)
+        try:
+            if projector.pool.rtt is None:
+                await session.exchange('QPW', self.timeout)
+                projector.pool.record('QPW', session)
+                projector.pool.record_rtt(session.rtt)
+        except BaseException:
+            projector.pool.release(session, reuse=False)
+            raise
+        self._armed[projector] = session
+
+    async def arm(self):
+        pending = [p for p in self.projectors if p not in self._armed]
+        results = await asyncio.gather(
+            *(self._arm_one(projector) for projector in pending),
+            return_exceptions=True
+        )
+        for projector, result in zip(pending, results):
+            if isinstance(result, Exception):
+                self._errors[projector] = result
+
+    def disarm(self):
+        for projector, session in self._armed.items():
+            projector.pool.release(session)
+        self._armed = {}
+
+    async def fire(self, cmd):
+        if not self._armed and not self._errors:
+            await self.arm()
+
+        report = FireReport(cmd)
+        report.answers.update(self._errors)
+        armed, self._armed, self._errors = self._armed, {}, {}
+
+        rtts = {p: p.pool.rtt or 0.0 for p in armed}
+        lead = max(rtts.values(), default=0.0) / 2
+        fire_at = time.monotonic() + self.margin + lead
+        report.fire_at = fire_at
+        plan = sorted(
+            armed.items(), key=lambda item: fire_at - rtts[item[0]] / 2
+        )
+
+        for projector, session in plan:
+            send_at = fire_at - rtts[projector] / 2
+            delay = send_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            session.send(cmd)
+            projector.last_command_at = session.sent_at
+            report.lateness[projector] = session.sent_at - send_at
+            report.arrivals[projector] = (
+                session.sent_at + rtts[projector] / 2
+            )
+
+        async def collect(projector, session):
+            try:
+                answer = await session.receive(self.timeout)
+            except (ConnectionError, OSError) as e:
+                projector.pool.record(cmd, error=e)
+                projector.pool.release(session, reuse=False)
+                if isinstance(e, asyncio.TimeoutError):
+                    raise
+                # Сессия оказалась закрытой — обычная отправка
+                return await projector.send_cmd(cmd, self.timeout)
+            projector.pool.record(cmd, session, answer=answer)
+            projector.pool.release(session)
+            return answer
+
+        answers = await asyncio.gather(
+            *(collect(projector, session) for projector, session in plan),
+            return_exceptions=True
+        )
+        for (projector, _), answer in zip(plan, answers):
+            report.answers[projector] = answer
+        return report
+
+
+async def fire_synchronized(projectors, cmd, timeout=2):
+    group = GroupFire(projectors, timeout=timeout)
+    await group.arm()
+    return await group.fire(cmd)
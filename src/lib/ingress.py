@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+from lib.metrics import METRICS
+
+
+class Ingress:
+    """
+    Ограниченная очередь входящих OSC-сообщений перед Controller.
+
+    Цель сообщения — key_of(address, params), например шаттер
+    проектора 13; у сообщений без цели она общая. Сообщение, в точности
+    повторяющее последнее принятое для той же цели, в пределах window
+    секунд не выполняется (coalesced); open, close, open — три разных
+    намерения, и последним выполнится open. Для каждой цели ждёт только
+    последнее намерение: более новое заменяет ждущее (superseded). Одновременно
+    выполняется не больше limit сообщений, ждут не больше max_pending;
+    при переполнении отбрасывается самое старое (dropped). Счётчики
+    пишутся в metrics под именем name.
+    """
+
+    def __init__(self, key_of=None, window=0.05, limit=16, max_pending=256,
+                 metrics=METRICS, name='osc') -> None:
+        self.key_of = key_of
+        self.window = window
+        self.limit = limit
+        self.max_pending = max_pending
+        self.metrics = metrics
+        self.name = name
+        self._last = {}
+        self._pending = {}
+        self._running = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def count(self, counter):
+        self.metrics.count(self.name, counter)
+
+    def target_of(self, message):
+        """
+        (key, signature): цель сообщения (None, если у него нет цели) и
+        его подпись для сравнения повторов.
+        """
+        signature = (message.address, tuple(message.params))
+        key = None
+        if self.key_of is not None:
+            key = self.key_of(message.address, message.params)
+        return key, signature
+
+    def submit(self, message, run):
+        """
+        run() — корутина выполнения сообщения.
+        """
+        self.count('received')
+        key, signature = self.target_of(message)
+        now = time.monotonic()
+        last = self._last.get(key)
+        if (last is not None and last[0] == signature
+                and now - last[1] < self.window):
+            self.count('coalesced')
+            return
+        self._remember(key, signature, now)
+
+        # Ждущие сообщения без цели друг друга не заменяют
+        target = signature if key is None else key
+        if self._pending.pop(target, None) is not None:
+            self.count('superseded')
+        elif len(self._pending) >= self.max_pending:
+            oldest = next(iter(self._pending))
+            del self._pending[oldest]
+            self.count('dropped')
+        self._pending[target] = run
+        self._pump()
+
+    def _remember(self, key, signature, now):
+        # Последнее принятое сообщение для каждой цели
+        if key not in self._last and len(self._last) >= self.max_pending:
+            # Забываем всё, что старше окна, чтобы словарь не рос
+            self._last = {
+                other: last for other, last in self._last.items()
+                if now - last[1] < self.window
+            }
+            if len(self._last) >= self.max_pending:
+                self._last = {}
+        self._last[key] = (signature, now)
+
+    def _pump(self):
+        while self._pending and self._running < self.limit:
+            target = next(iter(self._pending))
+            run = self._pending.pop(target)
+            self._running += 1
+            asyncio.create_task(self._run(run))
+
+    async def _run(self, run):
+        try:
+            await run()
+        except Exception as e:
+            print(f"OSC command failed: {e}")
+        finally:
+            self._running -= 1
+            self._pump()
@@ -0,0 +1,165 @@
+import asyncio
+import collections
+import time
+
+PHASES = ('queue', 'connect', 'greeting', 'auth', 'response', 'lateness')
+# Размер ответа /metrics: меньше MTU, чтобы датаграмма не дробилась
+MAX_REPLY = 1200
+
+
+def command_code(cmd):
+    """
+    'QVX:SEFS1' -> 'QVX', 'OSH:0' -> 'OSH', 'QPW' -> 'QPW'
+    """
+    return cmd.split(':', 1)[0].split('=', 1)[0]
+
+
+class Histogram:
+    """
+    Скользящее окно последних size замеров.
+    """
+
+    def __init__(self, size=512) -> None:
+        self.samples = collections.deque(maxlen=size)
+        self.count = 0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1
+
+    def percentile(self, p):
+        if not self.samples:
+            return 0.0
+        values = sorted(self.samples)
+        index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+        return values[index]
+
+
+class Metrics:
+    """
+    Время фаз каждой команды (подключение, приветствие, авторизация,
+    ответ) по проекторам и кодам команд, счётчики таймаутов и ошибок.
+    Ожидание слота пула пишется по очередям ('lane:control',
+    'lane:refresh') для каждого проектора и для всех сразу ('*').
+    counters — прочие счётчики по имени (например, 'osc' у Ingress).
+    """
+
+    def __init__(self, size=512) -> None:
+        self.size = size
+        self.histograms = {}
+        self.timeouts = collections.Counter()
+        self.errors = collections.Counter()
+        self.counters = {}
+
+    def observe(self, name, code, phase, seconds):
+        key = (name, code, phase)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(self.size)
+        histogram.add(seconds)
+
+    def queue_wait(self, name, lane, seconds):
+        self.observe(name, f'lane:{lane}', 'queue', seconds)
+        self.observe('*', f'lane:{lane}', 'queue', seconds)
+
+    def timeout(self, name, code):
+        self.timeouts[(name, code)] += 1
+
+    def error(self, name, code):
+        self.errors[(name, code)] += 1
+
+    def count(self, name, counter, n=1):
+        counters = self.counters.get(name)
+        if counters is None:
+            counters = self.counters[name] = collections.Counter()
+        counters[counter] += n
+
+    def rows(self, name=None):
+        keys = {(n, c) for n, c, phase in self.histograms}
+        keys.update(self.timeouts)
+        keys.update(self.errors)
+        rows = []
+        for row_name, code in sorted(keys):
+            if name is not None and row_name != name:
+                continue
+            row = {
+                'name': row_name,
+                'code': code,
+                'timeouts': self.timeouts[(row_name, code)],
+                'errors': self.errors[(row_name, code)],
+            }
+            for phase in PHASES:
+                histogram = self.histograms.get((row_name, code, phase))
+                if histogram is not None:
+                    row[phase] = (
+                        histogram.count,
+                        histogram.percentile(50),
+                        histogram.percentile(95),
+                        histogram.percentile(99),
+                    )
+            rows.append(row)
+        return rows
+
+    def lines(self, name=None):
+        lines = []
+        for row in self.rows(name):
+            parts = [f"{row['name']} {row['code']}"]
+            for phase in PHASES:
+                if phase in row:
+                    count, p50, p95, p99 = row[phase]
+                    parts.append(
+                        f"{phase} n={count} p50={p50 * 1000:.1f}"
+                        f" p95={p95 * 1000:.1f} p99={p99 * 1000:.1f}ms"
+                    )
+            parts.append(f"timeouts={row['timeouts']}")
+            parts.append(f"errors={row['errors']}")
+            lines.append(' | '.join(parts))
+        for counter_name, counters in sorted(self.counters.items()):
+            if name is not None and counter_name != name:
+                continue
+            values = ' '.join(
+                f"{counter}={value}" for counter, value in counters.items())
+            lines.append(f"{counter_name} {values}")
+        return lines
+
+    def query_handler(self, address, *args):
+        """
+        OSC /metrics [name]: строки по паре проектор/команда. Все строки
+        большой системы в одну датаграмму UDP не помещаются, поэтому
+        ответ — несколько сообщений /metrics, каждое не больше
+        MAX_REPLY байт.
+        """
+        name = str(args[0]) if args else None
+        replies = []
+        page = []
+        size = 0
+        for line in self.lines(name):
+            # Строка OSC: байты + 0 и выравнивание на 4, плюс тег типа
+            length = len(line.encode()) // 4 * 4 + 5
+            if page and size + length > MAX_REPLY:
+                replies.append((address, *page))
+                page = []
+                size = 0
+            page.append(line)
+            size += length
+        replies.append((address, *page))
+        return replies
+
+    async def report(self, interval=60.0, file_path=None):
+        # Периодический вывод в консоль или дозапись в файл
+        while True:
+            await asyncio.sleep(interval)
+            lines = self.lines()
+            if not lines:
+                continue
+            stamp = time.strftime('%Y-%m-%d %H:%M:%S')
+            if file_path is None:
+                for line in lines:
+                    print(f"[metrics] {line}")
+            else:
+                with open(file_path, 'a') as file:
+                    for line in lines:
+                        file.write(f"{stamp} {line}\n")
+
+
+METRICS = Metrics()
@@ -0,0 +1,145 @@
+import hashlib
+
+CR = b'\r'
+MAX_LINE = 1024
+
+# Ошибки протокола (без "00") и ошибки команды (после "00")
+ERRORS = {
+    'ERR1': 'undefined control command',
+    'ERR2': 'out of parameter range',
+    'ERR3': 'busy state or no-acceptable period',
+    'ERR4': 'timeout or no-acceptable period',
+    'ERR5': 'wrong data length',
+    'ERRA': 'password mismatch',
+    'ER401': 'command cannot be executed',
+    'ER402': 'invalid parameter',
+}
+
+
+class ProtocolError(ConnectionError):
+    """
+    Проектор прислал не то, что ожидалось по NTCONTROL.
+    """
+
+
+class ErrorReply(str):
+    """
+    Ответ-ошибка проектора. Это строка с кодом ('ERR3', 'ER401'),
+    поэтому сравнивается и печатается как обычный ответ.
+    """
+
+    __slots__ = ()
+
+    @property
+    def code(self):
+        return str(self)
+
+    @property
+    def description(self):
+        return ERRORS.get(self, 'unknown error')
+
+
+class Greeting:
+    """
+    Приветствие проектора: "NTCONTROL 1 <rand>" — команды подписываются
+    MD5, "NTCONTROL 0" — защита выключена.
+    """
+
+    __slots__ = ('secure', 'token')
+
+    def __init__(self, secure, token=b'') -> None:
+        self.secure = secure
+        self.token = token
+
+    def prefix(self, login, password):
+        """
+        Байты перед каждой командой.
+        """
+        if not self.secure:
+            return b'00'
+        auth_data = b'%s:%s:%s' % (
+            login.encode(), password.encode(), self.token)
+        return hashlib.md5(auth_data).hexdigest().encode() + b'00'
+
+
+def parse_greeting(line):
+    parts = bytes(line).split(b' ')
+    if parts[0] != b'NTCONTROL' or len(parts) < 2:
+        raise ProtocolError(f"Unexpected greeting: {line!r}")
+    if parts[1] == b'0':
+        return Greeting(False)
+    if parts[1] == b'1' and len(parts) == 3 and parts[2]:
+        return Greeting(True, parts[2])
+    raise ProtocolError(f"Unexpected greeting: {line!r}")
+
+
+def encode_command(prefix, cmd):
+    return b'%s%s\r' % (prefix, cmd.encode('ascii'))
+
+
+def decode_reply(line):
+    """
+    b'00001' -> '001', b'00ER401' -> ErrorReply('ER401'),
+    b'ERRA' -> ErrorReply('ERRA').
+    """
+    if line[:3] == b'ERR':
+        return ErrorReply(line.decode('ascii', 'replace'))
+    if line[:2] != b'00':
+        raise ProtocolError(f"Unexpected reply: {bytes(line)!r}")
+    answer = line[2:].decode('ascii', 'replace')
+    if answer.startswith('ER'):
+        return ErrorReply(answer)
+    return answer
+
+
+class Framer:
+    """
+    Нарезка потока байт на сообщения, завершённые CR.
+
+    feed() добавляет принятые байты, next() возвращает очередное
+    сообщение без CR или None, если оно ещё не пришло целиком. Остаток
+    буфера сохраняется для следующего ответа, поэтому ответы, пришедшие
+    одним сегментом или разорванные между сегментами, разбираются
+    одинаково.
+    """
+
+    __slots__ = ('_buffer', '_start', 'limit')
+
+    def __init__(self, limit=MAX_LINE) -> None:
+        self._buffer = bytearray()
+        self._start = 0
+        self.limit = limit
+
+    def __len__(self):
+        return len(self._buffer) - self._start
+
+    def feed(self, data):
+        if self._start:
+            del self._buffer[:self._start]
+            self._start = 0
+        self._buffer += data
+
+    def next(self):
+        end = self._buffer.find(CR, self._start)
+        if end < 0:
+            if len(self) > self.limit:
+                raise ProtocolError(
+                    f"No CR in {len(self)} bytes from projector")
+            return None
+        line = bytes(self._buffer[self._start:end])
+        self._start = end + 1
+        return line
+
+
+async def read_line(reader, framer):
+    """
+    Следующее сообщение из asyncio.StreamReader через framer.
+    """
+    line = framer.next()
+    while line is None:
+        data = await reader.read(4096)
+        if not data:
+            raise ConnectionResetError('Connection closed by projector')
+        framer.feed(data)
+        line = framer.next()
+    return line
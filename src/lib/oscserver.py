@@ -0,0 +1,94 @@
+import asyncio
+import functools
+import time
+
+from pythonosc import osc_packet
+from pythonosc.osc_message_builder import build_msg
+
+
+class OSCProtocol(asyncio.DatagramProtocol):
+    """
+    Приём OSC по UDP.
+
+    В отличие от AsyncIOOSCUDPServer (его Dispatcher ждёт время bundle
+    через time.sleep и блокирует цикл) сообщения с будущим временем
+    уходят в scheduler, остальные сразу. prepare(address) — корутина
+    подготовки к команде (открыть сессии), её scheduler вызывает
+    заранее. Выполнение идёт через ingress (очередь с ограничением),
+    если он задан; по его цели сообщения scheduler отбрасывает повторы
+    и устаревшие команды уже при постановке. Обработчик может вернуть
+    корутину — её дождутся; другие ответы обработчиков отправляются
+    отправителю, как в python-osc (список ответов — отдельными
+    сообщениями). recorder (если задан) записывает каждую датаграмму.
+    """
+
+    def __init__(self, dispatcher, scheduler, prepare=None,
+                 ingress=None, recorder=None) -> None:
+        self.dispatcher = dispatcher
+        self.scheduler = scheduler
+        self.prepare = prepare
+        self.ingress = ingress
+        self.recorder = recorder
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, client_address):
+        if self.recorder is not None:
+            self.recorder.osc(data)
+        try:
+            packet = osc_packet.OscPacket(data)
+        except osc_packet.ParseError:
+            return
+        now = time.time()
+        for timed_msg in packet.messages:
+            message = timed_msg.message
+            if timed_msg.time <= now:
+                self.submit(message, client_address)
+                continue
+            arm = None
+            if self.prepare is not None:
+                arm = functools.partial(self.prepare, message.address)
+            key, signature = None, None
+            if self.ingress is not None:
+                key, signature = self.ingress.target_of(message)
+                # Без цели совпадают только точные повторы на то же время
+                if key is None:
+                    key = (timed_msg.time, signature)
+            self.scheduler.schedule(
+                timed_msg.time,
+                lambda message=message: self.submit(
+                    message, client_address),
+                arm=arm,
+                name=message.address,
+                key=key,
+                signature=signature,
+            )
+
+    def submit(self, message, client_address):
+        run = functools.partial(self.dispatch, message, client_address)
+        if self.ingress is not None:
+            self.ingress.submit(message, run)
+        else:
+            asyncio.create_task(run())
+
+    async def dispatch(self, message, client_address):
+        jobs = []
+        for handler in self.dispatcher.handlers_for_address(message.address):
+            result = handler.invoke(client_address, message)
+            if asyncio.iscoroutine(result):
+                jobs.append(result)
+                continue
+            if result is None or self.transport is None:
+                continue
+            # Список — несколько ответов, каждый своей датаграммой
+            replies = result if isinstance(result, list) else [result]
+            for reply in replies:
+                if not isinstance(reply, tuple):
+                    reply = [reply]
+                message = build_msg(reply[0], reply[1:])
+                self.transport.sendto(message.dgram, client_address)
+                await asyncio.sleep(0)
+        if jobs:
+            await asyncio.gather(*jobs)
@@ -0,0 +1,129 @@
+import asyncio
+import random
+import time
+
+from lib.breaker import Offline
+from lib.pool import Preempted
+
+FIELDS = ('power', 'shutter', 'shutter_in_time', 'shutter_out_time')
+
+
+class StatusPoller:
+    """
+    Фоновый опрос состояния проекторов через get_info.
+
+    Интервал опроса подбирается для каждого проектора отдельно: fast
+    в течение fast_window после команды или изменения состояния,
+    normal для стабильного проектора, и от slow до slow_max (удваивая)
+    для недоступного. Моменты опроса разнесены случайным сдвигом, чтобы
+    проекторы не опрашивались одновременно. on_change(item, changed)
+    вызывается только если какое-то из полей FIELDS изменилось,
+    on_probe(item, ok) — после каждого завершённого опроса.
+    """
+
+    def __init__(self, items, on_change,
+                 projector_of=lambda item: item.projector,
+                 fast=1.0, normal=5.0, slow=15.0, slow_max=60.0,
+                 fast_window=10.0, limit=8, tick=0.25,
+                 on_probe=None) -> None:
+        self.items = items
+        self.on_change = on_change
+        self.on_probe = on_probe
+        self.projector_of = projector_of
+        self.fast = fast
+        self.normal = normal
+        self.slow = slow
+        self.slow_max = slow_max
+        self.fast_window = fast_window
+        self.tick = tick
+        self._slots = asyncio.Semaphore(limit)
+        self._state = {}
+        self._in_flight = set()
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _new_state(self, now):
+        # Случайная фаза, чтобы первые опросы не совпали
+        return {
+            'last': now - random.random() * self.normal,
+            'failures': 0,
+            'changed_at': 0.0,
+            'jitter': random.uniform(-0.1, 0.1),
+        }
+
+    def interval(self, item, state, now):
+        if state['failures']:
+            interval = min(
+                self.slow * 2 ** (state['failures'] - 1), self.slow_max
+            )
+        else:
+            projector = self.projector_of(item)
+            recent = max(state['changed_at'], projector.last_command_at)
+            if now - recent < self.fast_window:
+                interval = self.fast
+            else:
+                interval = self.normal
+        return interval * (1 + state['jitter'])
+
+    async def poll(self, item, state):
+        projector = self.projector_of(item)
+        before = tuple(getattr(projector, field) for field in FIELDS)
+        try:
+            async with self._slots:
+                ok = await projector.get_info()
+        except Preempted:
+            # Уступили управляющей команде — это не сбой проектора
+            ok = None
+        except Offline:
+            # Недоступный проектор проверяет breaker, опрос не нужен
+            ok = None
+        except Exception:
+            ok = False
+        finally:
+            state['last'] = time.monotonic()
+            self._in_flight.discard(item)
+
+        if ok is None:
+            return
+        if self.on_probe is not None:
+            self.on_probe(item, ok)
+
+        state['failures'] = 0 if ok else state['failures'] + 1
+        after = tuple(getattr(projector, field) for field in FIELDS)
+        changed = [
+            field for field, old, new in zip(FIELDS, before, after)
+            if old != new
+        ]
+        if changed:
+            state['changed_at'] = state['last']
+            self.on_change(item, changed)
+
+    async def run(self):
+        while True:
+            now = time.monotonic()
+            current = list(self.items())
+            for item in current:
+                state = self._state.get(item)
+                if state is None:
+                    state = self._state[item] = self._new_state(now)
+                if item in self._in_flight:
+                    continue
+                if now - state['last'] >= self.interval(item, state, now):
+                    self._in_flight.add(item)
+                    asyncio.create_task(self.poll(item, state))
+
+            if len(self._state) > len(current):
+                alive = set(current)
+                self._state = {
+                    item: state for item, state in self._state.items()
+                    if item in alive
+                }
+            await asyncio.sleep(self.tick)
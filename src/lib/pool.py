@@ -0,0 +1,369 @@
+import asyncio
+import collections
+import time
+
+from lib.breaker import CircuitBreaker
+from lib.metrics import METRICS, command_code
+from lib.ntcontrol import (Framer, ProtocolError, decode_reply,
+                           encode_command, parse_greeting, read_line)
+
+# Очереди к пулу по приоритету: управляющие команды (шаттер, питание)
+# всегда идут раньше опроса состояния
+CONTROL = 'control'
+REFRESH = 'refresh'
+LANES = (CONTROL, REFRESH)
+
+
+class ConnectTimeout(asyncio.TimeoutError):
+    pass
+
+
+class Preempted(Exception):
+    """
+    Опрос прерван, чтобы пропустить управляющую команду.
+    """
+
+
+def lane_of(cmds):
+    if all(cmd.startswith('Q') for cmd in cmds):
+        return REFRESH
+    return CONTROL
+
+
+class Session:
+    def __init__(self, reader, writer, prefix, framer=None) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.prefix = prefix
+        # Байты, пришедшие после предыдущего ответа, остаются в framer
+        self.framer = framer or Framer()
+        self.last_used = time.monotonic()
+        self.sent_at = None
+        self.rtt = None
+        self.preempted = False
+
+    def in_flight(self):
+        """
+        Сколько секунд ждём ответа на отправленную команду (None — не
+        ждём).
+        """
+        if self.sent_at is None or self.sent_at < self.last_used:
+            return None
+        return time.monotonic() - self.sent_at
+
+    def is_alive(self):
+        return not (self.reader.at_eof() or self.writer.is_closing())
+
+    def expired(self, idle_timeout):
+        return time.monotonic() - self.last_used > idle_timeout
+
+    def send(self, cmd):
+        self.writer.write(encode_command(self.prefix, cmd))
+        self.sent_at = time.monotonic()
+
+    async def receive(self, timeout):
+        await self.writer.drain()
+        line = await asyncio.wait_for(
+            read_line(self.reader, self.framer), timeout)
+        self.last_used = time.monotonic()
+        self.rtt = self.last_used - self.sent_at
+        return decode_reply(line)
+
+    async def exchange(self, cmd, timeout):
+        self.send(cmd)
+        return await self.receive(timeout)
+
+    def close(self):
+        self.writer.close()
+
+
+class ConnectionPool:
+    """
+    Пул авторизованных NTCONTROL-сессий одного проектора.
+
+    Сессия после ответа не закрывается, а возвращается в пул. Если
+    проектор сам закрыл соединение, команда повторяется на новом
+    соединении (reconnects). Соединения, простаивающие дольше
+    idle_timeout, закрываются при следующем обращении. Время фаз каждой
+    команды и ошибки пишутся в metrics под именем name.
+
+    Свободный слот пула получает сначала очередь CONTROL, потом REFRESH.
+    Опрос, держащий сессию, уступает её между командами пакета, а если
+    ответ на запрос опроса задерживается дольше preempt_after (и двух
+    RTT), сессия закрывается — опрос получает Preempted.
+
+    Сбои подключения и таймауты учитывает breaker: недоступный проектор
+    сразу получает Offline и проверяется в фоне подключением.
+
+    recorder (lib.recorder.Recorder или None) получает каждую команду с
+    ответом и временем ответа.
+    """
+
+    def __init__(self, ip, port, login, password,
+                 max_size=1, idle_timeout=10.0,
+                 name=None, metrics=METRICS) -> None:
+        self.name = name or ip
+        self.metrics = metrics
+        self.ip = ip
+        self.port = port
+        self.login = login
+        self.password = password
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.preempt_after = 0.1
+        self._idle = []
+        self._in_use = 0
+        self._waiters = {lane: collections.deque() for lane in LANES}
+        self._refreshing = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.reconnects = 0
+        self.preemptions = 0
+        self.rtt = None  # Сглаженное время ответа, сек.
+        self.breaker = CircuitBreaker(self.name)
+        self.recorder = None
+
+    async def _connect(self, timeout, code='*'):
+        started = time.monotonic()
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.ip, self.port), timeout
+            )
+        except Exception as e:
+            self.metrics.timeout(self.name, code)
+            self.breaker.failure(self._probe)
+            raise ConnectTimeout(
+                f"Connection to {self.ip}:{self.port} timed out") from e
+        connected = time.monotonic()
+        self.metrics.observe(self.name, code, 'connect', connected - started)
+        framer = Framer()
+        try:
+            line = await asyncio.wait_for(read_line(reader, framer), timeout)
+        except Exception as e:
+            writer.close()
+            self.metrics.timeout(self.name, code)
+            self.breaker.failure(self._probe)
+            raise ConnectTimeout(
+                f"No greeting from {self.ip}:{self.port}") from e
+        greeted = time.monotonic()
+        self.metrics.observe(self.name, code, 'greeting', greeted - connected)
+        try:
+            greeting = parse_greeting(line)
+        except ProtocolError:
+            writer.close()
+            self.metrics.error(self.name, code)
+            self.breaker.failure(self._probe)
+            raise
+        prefix = greeting.prefix(self.login, self.password)
+        self.metrics.observe(
+            self.name, code, 'auth', time.monotonic() - greeted)
+        return Session(reader, writer, prefix, framer)
+
+    async def _probe(self):
+        # Фоновая проверка недоступного проектора: удачное подключение
+        # остаётся в пуле для следующей команды
+        session = await self._connect(2, 'probe')
+        self._idle.append(session)
+
+    def record(self, cmd, session=None, error=None, answer=None):
+        code = command_code(cmd)
+        if isinstance(error, asyncio.TimeoutError):
+            self.metrics.timeout(self.name, code)
+        elif error is not None:
+            self.metrics.error(self.name, code)
+        elif session is not None and session.rtt is not None:
+            self.metrics.observe(self.name, code, 'response', session.rtt)
+        if self.recorder is not None:
+            if error is not None:
+                self.recorder.command(self.name, cmd, type(error).__name__)
+            else:
+                self.recorder.command(
+                    self.name, cmd, answer,
+                    session.rtt if session is not None else None)
+
+    def _waiting(self, lane):
+        # Есть ли ждущие с тем же или более высоким приоритетом
+        for waiting_lane in LANES:
+            if self._waiters[waiting_lane]:
+                return True
+            if waiting_lane == lane:
+                return False
+        return False
+
+    async def _take_slot(self, lane):
+        if self._in_use < self.max_size and not self._waiting(lane):
+            self._in_use += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(future)
+        if lane == CONTROL:
+            self._preempt()
+        try:
+            await future
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # Слот уже передан нам — отдаём следующему
+                self._free_slot()
+            elif future in self._waiters[lane]:
+                self._waiters[lane].remove(future)
+            raise
+
+    def _free_slot(self):
+        for lane in LANES:
+            waiters = self._waiters[lane]
+            while waiters:
+                future = waiters.popleft()
+                if not future.done():
+                    future.set_result(None)
+                    return
+        self._in_use -= 1
+
+    def _preempt(self):
+        if not self._waiters[CONTROL]:
+            return
+        limit = max(self.preempt_after, 2 * (self.rtt or 0.0))
+        recheck = None
+        for session in list(self._refreshing):
+            waited = session.in_flight()
+            if waited is None:
+                continue
+            if waited >= limit:
+                session.preempted = True
+                session.close()
+            else:
+                left = limit - waited
+                recheck = left if recheck is None else min(recheck, left)
+        if recheck is not None:
+            asyncio.get_running_loop().call_later(recheck, self._preempt)
+
+    async def acquire(self, timeout, code='*', lane=CONTROL):
+        """
+        Возвращает (session, reused). Занимает слот пула до release().
+        """
+        self.breaker.check()
+        started = time.monotonic()
+        await self._take_slot(lane)
+        self.metrics.queue_wait(self.name, lane, time.monotonic() - started)
+        try:
+            while self._idle:
+                session = self._idle.pop()
+                if session.is_alive() and not session.expired(
+                        self.idle_timeout):
+                    self.hits += 1
+                    return session, True
+                session.close()
+            self.misses += 1
+            return await self._connect(timeout, code), False
+        except BaseException:
+            self._free_slot()
+            raise
+
+    def record_rtt(self, rtt):
+        if rtt is None:
+            return
+        self.rtt = rtt if self.rtt is None else 0.8 * self.rtt + 0.2 * rtt
+
+    def release(self, session, reuse=True):
+        self.record_rtt(session.rtt)
+        session.rtt = None
+        if reuse and session.is_alive():
+            self._idle.append(session)
+        else:
+            session.close()
+        self._free_slot()
+
+    async def execute_batch(self, cmds, timeout, lane=None):
+        """
+        Выполняет команды по очереди в одной сессии, ответы по порядку.
+        По умолчанию пакет из одних запросов (Q...) идёт в очереди
+        REFRESH, остальное — CONTROL.
+        """
+        if lane is None:
+            lane = lane_of(cmds)
+        session, reused = await self.acquire(
+            timeout, command_code(cmds[0]), lane)
+        answers = []
+        reuse = False
+        try:
+            for cmd in cmds:
+                if lane == REFRESH:
+                    if self._waiters[CONTROL]:
+                        # Ждёт управляющая команда: уступаем ей сессию
+                        self.preemptions += 1
+                        reuse = True
+                        raise Preempted(f"{cmd} to {self.name} preempted")
+                    self._refreshing.add(session)
+                try:
+                    try:
+                        answers.append(await session.exchange(cmd, timeout))
+                    except asyncio.TimeoutError:
+                        raise
+                    except (ConnectionError, OSError):
+                        if session.preempted:
+                            self.preemptions += 1
+                            raise Preempted(
+                                f"{cmd} to {self.name} preempted")
+                        if not reused:
+                            raise
+                        # Проектор закрыл соединение после предыдущего
+                        # ответа
+                        session.close()
+                        self._refreshing.discard(session)
+                        self.reconnects += 1
+                        session = await self._connect(
+                            timeout, command_code(cmd))
+                        if lane == REFRESH:
+                            self._refreshing.add(session)
+                        answers.append(await session.exchange(cmd, timeout))
+                except (ConnectTimeout, Preempted):
+                    raise
+                except Exception as e:
+                    self.record(cmd, error=e)
+                    if isinstance(e, (asyncio.TimeoutError,
+                                      ConnectionError, OSError)):
+                        self.breaker.failure(self._probe)
+                    raise
+                finally:
+                    self._refreshing.discard(session)
+                self.record(cmd, session, answer=answers[-1])
+                reused = True
+            reuse = True
+            self.breaker.success()
+        finally:
+            self.release(session, reuse)
+        return answers
+
+    async def warm(self, timeout=2):
+        """
+        Готовит сессию к ближайшей команде: открывает её, если в пуле
+        нет живой, и замеряет RTT, если он ещё неизвестен.
+        """
+        session, reused = await self.acquire(timeout, 'warm', REFRESH)
+        reuse = False
+        try:
+            if self.rtt is None:
+                await session.exchange('QPW', timeout)
+                self.record('QPW', session)
+            reuse = True
+        finally:
+            self.release(session, reuse)
+
+    async def execute(self, cmd, timeout):
+        answers = await self.execute_batch([cmd], timeout)
+        return answers[0]
+
+    def close(self):
+        self.breaker.stop()
+        while self._idle:
+            self._idle.pop().close()
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'reconnects': self.reconnects,
+            'preemptions': self.preemptions,
+            'online': self.breaker.online,
+            'rtt': self.rtt,
+        }
@@ -1,9 +1,40 @@
-import hashlib
 import asyncio
+import time
+
+from lib.breaker import Offline
+from lib.command_queue import CommandQueue
+from lib.ntcontrol import ErrorReply
+from lib.pool import ConnectionPool, ConnectTimeout, Preempted
+from lib.relay import RelayPool, relay_client
 
 
 class Projector:
-    def __init__(self, ip, port, login, password, label, id) -> None:
+    # Проекторов в шоу сотни: без __dict__ у каждого, общие таблицы —
+    # атрибуты класса
+    __slots__ = (
+        'ip', 'ip_room_nomber', 'port', 'login', 'password', 'label', 'id',
+        'power', 'group', 'shutter', 'shutter_in_time', 'shutter_out_time',
+        'last_command_at', 'updated_at', 'in_flight', 'suppressed', 'pool',
+        'queue', 'relay',
+    )
+
+    SHUTTER_OPEN = False
+    SHUTER_CLOSED = True
+    # Сколько секунд подтверждённое значение поля считается актуальным.
+    # Время шаттера меняется редко: его перечитываем после
+    # set_shutter_in/out или раз в несколько минут.
+    STATE_TTL = {
+        'power': 5.0,
+        'shutter': 3.0,
+        'shutter_in_time': 300.0,
+        'shutter_out_time': 300.0,
+    }
+    # Допустимое время открытия/закрытия шаттера (SEFS1/SEFS2), сек.
+    shutter_time_dict = (0.0, 0.5, 1.0, 1.5, 2.0, 2.5,
+                         3.0, 3.5, 4.0, 5.0, 7.0, 10.0)
+
+    def __init__(self, ip, port, login, password, label, id,
+                 pool_size=1, idle_timeout=10.0, relay=None) -> None:
         self.ip = ip
         self.ip_room_nomber = ip.split('.')[-1]
         self.port = port
@@ -19,91 +50,210 @@ class Projector:
         self.shutter = None
         self.shutter_in_time = None
         self.shutter_out_time = None
-        self.shutter_time_dict = [0.0, 0.5, 1.0, 1.5, 2.0, 2.5,
-                                  3.0, 3.5, 4.0, 5.0, 7.0, 10.0]
-        self.SHUTTER_OPEN = False
-        self.SHUTER_CLOSED = True
+        self.last_command_at = 0.0
+        # Когда значение поля последний раз подтвердил проектор
+        self.updated_at = dict.fromkeys(self.STATE_TTL)
+        # Поле -> значение команды, которая сейчас отправлена проектору
+        self.in_flight = {}
+        self.suppressed = 0
 
-    async def send_cmd(self, cmd, timeout=2):
-        try:
-            reader, writer = await asyncio.wait_for(
-                asyncio.open_connection(self.ip, self.port), timeout
+        # relay — адрес агента "host:port" в подсети проектора: команды
+        # выполняет он на своих сессиях
+        self.relay = relay
+        if relay:
+            self.pool = RelayPool(
+                relay_client(relay), ip, port, login, password,
+                name=self.label
             )
-        except Exception as e:
-            raise asyncio.TimeoutError(
-                f"Connection to {self.ip}:{self.port} timed out") from e
+        else:
+            self.pool = ConnectionPool(
+                ip, port, login, password,
+                max_size=pool_size, idle_timeout=idle_timeout,
+                name=self.label
+            )
+        # Управляющие команды идут через очередь по одной, ждущая
+        # команда заменяется более новой того же вида
+        self.queue = CommandQueue(self._execute)
+
+    async def send_cmd(self, cmd, timeout=2):
+        if not cmd.startswith('Q'):
+            self.last_command_at = time.monotonic()
         try:
-            serv_answer = await asyncio.wait_for(reader.read(1024), timeout)
-            decode_answer = serv_answer.decode()
-            rand_num = decode_answer.split(' ')[-1][0:-1]
-            auth_data = f'{self.login}:{self.password}:{rand_num}'
-            md5hash = hashlib.md5(auth_data.encode())
-            command = md5hash.hexdigest() + chr(48) + chr(48) + cmd + chr(13)
-            writer.write(command.encode())
-            await writer.drain()
-            answ = await asyncio.wait_for(reader.read(21), timeout)
-            decode_answer = answ.decode()[2:-1]
+            decode_answer = await self.pool.execute(cmd, timeout)
+        except (ConnectTimeout, Preempted, Offline):
+            raise
         except asyncio.TimeoutError:
             print('Connection timed out')
             decode_answer = 'Timeout'
         except Exception as exc:
             print('Connection error:', exc)
             raise exc
-        finally:
-            writer.close()
-            await writer.wait_closed()
         return decode_answer
 
+    def close(self):
+        self.pool.close()
+
+    async def send_batch(self, cmds, timeout=2):
+        try:
+            answers = await self.pool.execute_batch(cmds, timeout)
+        except (ConnectTimeout, Preempted, Offline):
+            raise
+        except asyncio.TimeoutError:
+            print('Connection timed out')
+            answers = ['Timeout'] * len(cmds)
+        except Exception as exc:
+            print('Connection error:', exc)
+            raise exc
+        return answers
+
+    @property
+    def online(self):
+        return self.pool.breaker.online
+
+    def is_fresh(self, field):
+        updated_at = self.updated_at[field]
+        return updated_at is not None and (
+            time.monotonic() - updated_at <= self.STATE_TTL[field])
+
+    @staticmethod
+    def same(field, current, value):
+        if field in ('shutter_in_time', 'shutter_out_time'):
+            try:
+                return float(current) == float(value)
+            except (TypeError, ValueError):
+                return False
+        return current == value
+
+    def known(self, field, value):
+        """
+        True, если проектор недавно подтвердил, что field == value, и
+        ни отправленная, ни ждущая в очереди команда не меняет field на
+        другое значение.
+        """
+        if not self.is_fresh(field):
+            return False
+        if field in self.in_flight and not self.same(
+                field, self.in_flight[field], value):
+            return False
+        queued = None
+        for cmd in self.queued_commands(field):
+            queued = cmd
+        if queued is not None and not self.same(
+                field, self.effect(queued)[1], value):
+            return False
+        return self.same(field, getattr(self, field), value)
+
+    def queued_commands(self, field):
+        # Очередь хранит по одной ждущей команде каждого вида
+        for kind in ('power', 'shutter', 'SEFS1', 'SEFS2'):
+            cmd = self.queue.pending(kind)
+            if cmd is not None and self.effect(cmd)[0] == field:
+                yield cmd
+
+    def confirm(self, field, value):
+        setattr(self, field, value)
+        self.updated_at[field] = time.monotonic()
+
     async def get_info(self):
+        cmds = ['QPW', 'QSH']
+        if not self.is_fresh('shutter_in_time'):
+            cmds.append('QVX:SEFS1')
+        if not self.is_fresh('shutter_out_time'):
+            cmds.append('QVX:SEFS2')
         try:
-            power = await self.send_cmd('QPW')
+            answers = await self.send_batch(cmds)
+        except (Preempted, Offline):
+            raise
         except Exception as e:
             print(f"Error getting power state: {e}")
-            return
-        else:
-            if power == '001':
-                self.power = True
-                shutter = await self.send_cmd('QSH')
-                if shutter == '0':
-                    self.shutter = self.SHUTTER_OPEN
-                elif shutter == '1':
-                    self.shutter = self.SHUTER_CLOSED
-            elif power == '000':
-                self.power = False
+            return False
+
+        power, shutter = answers[:2]
+        for cmd, answer in zip(cmds[2:], answers[2:]):
+            if cmd == 'QVX:SEFS1':
+                field = 'shutter_in_time'
             else:
-                raise ValueError('Unknown power state')
+                field = 'shutter_out_time'
+            answer_time = answer.split('=')
+            if len(answer_time) > 1:
+                self.confirm(field, answer_time[1])
+            else:
+                setattr(self, field, 'None')
+
+        if power == '001':
+            self.confirm('power', True)
+            if shutter == '0':
+                self.confirm('shutter', self.SHUTTER_OPEN)
+            elif shutter == '1':
+                self.confirm('shutter', self.SHUTER_CLOSED)
+        elif power == '000':
+            self.confirm('power', False)
+        else:
+            raise ValueError('Unknown power state')
+        return True
+
+    def effect(self, cmd):
+        # Какое поле и на какое значение меняет команда
+        if cmd == 'PON':
+            return 'power', True
+        if cmd == 'POF':
+            return 'power', False
+        if cmd == 'OSH:0':
+            return 'shutter', self.SHUTTER_OPEN
+        if cmd == 'OSH:1':
+            return 'shutter', self.SHUTER_CLOSED
+        if cmd.startswith('VXX:SEFS1='):
+            return 'shutter_in_time', cmd.split('=', 1)[1]
+        if cmd.startswith('VXX:SEFS2='):
+            return 'shutter_out_time', cmd.split('=', 1)[1]
+        return None, None
 
-        get_shutter_in = await self.send_cmd('QVX:SEFS1')
-        answer_shutter_in_time = get_shutter_in.split('=')
-        self.shutter_in_time = answer_shutter_in_time[1] if (
-            len(answer_shutter_in_time) > 1) else 'None'
+    async def _execute(self, cmd):
+        field, value = self.effect(cmd)
+        if field is not None and self.known(field, value):
+            # Проектор уже в нужном состоянии — команду не отправляем
+            self.suppressed += 1
+            return 'Cached'
+        if field is not None:
+            self.in_flight[field] = value
+        try:
+            answer = await self.send_cmd(cmd)
+        finally:
+            self.in_flight.pop(field, None)
+        if field in ('shutter_in_time', 'shutter_out_time'):
+            # Новое значение перечитаем при следующем опросе
+            self.updated_at[field] = None
+        elif field is not None:
+            setattr(self, field, value)
+            confirmed = not (
+                answer == 'Timeout' or isinstance(answer, ErrorReply))
+            self.updated_at[field] = time.monotonic() if confirmed else None
+        return answer
 
-        get_shutter_out = await self.send_cmd('QVX:SEFS2')
-        answer_shutter_out_time = get_shutter_out.split('=')
-        self.shutter_out_time = answer_shutter_out_time[1] if (
-            len(answer_shutter_out_time) > 1) else 'None'
+    def submit(self, cmd, force=False):
+        if force:
+            field, value = self.effect(cmd)
+            if field is not None:
+                self.updated_at[field] = None
+        return self.queue.submit(cmd)
 
-    async def power_on(self):
-        await self.send_cmd('PON')
-        self.power = True
+    async def power_on(self, force=False):
+        return await self.submit('PON', force)
 
-    async def power_off(self):
-        await self.send_cmd('POF')
-        self.power = False
+    async def power_off(self, force=False):
+        return await self.submit('POF', force)
 
-    async def shutter_open(self):
-        await self.send_cmd('OSH:0')
-        self.shutter = self.SHUTTER_OPEN
+    async def shutter_open(self, force=False):
+        return await self.submit('OSH:0', force)
 
-    async def shutter_close(self):
-        await self.send_cmd('OSH:1')
-        self.shutter = self.SHUTER_CLOSED
+    async def shutter_close(self, force=False):
+        return await self.submit('OSH:1', force)
 
-    async def set_shutter_in(self, shutter_time):
-        await self.send_cmd(f'VXX:SEFS1={shutter_time}')
+    async def set_shutter_in(self, shutter_time, force=False):
+        return await self.submit(f'VXX:SEFS1={shutter_time}', force)
 
-    async def set_shutter_out(self, shutter_time):
-        await self.send_cmd(f'VXX:SEFS2={shutter_time}')
+    async def set_shutter_out(self, shutter_time, force=False):
+        return await self.submit(f'VXX:SEFS2={shutter_time}', force)
 
     def debug_info(self):
         print(
@@ -114,10 +264,15 @@ class Projector:
     PASSWORD--{self.password}
     LABEL-----{self.label}
     ID--------{self.id}
+    RELAY-----{self.relay or '-'}
+    ONLINE----{self.online}
     POWER-----{self.power}
     GROUP-----{self.group}
     SHUTTER---{self.shutter}
     SHUTTER_IN---{self.shutter_in_time}
     SHUTTER_OUT---{self.shutter_out_time}
+    POOL------{self.pool.stats()}
+    QUEUE-----{len(self.queue)} pending, {self.queue.coalesced} coalesced
+    SUPPRESSED-{self.suppressed}
         '''
         )
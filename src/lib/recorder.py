@@ -0,0 +1,113 @@
+import asyncio
+import struct
+import time
+
+# Журнал трафика: заголовок MAGIC и START (time.time() начала записи,
+# чтобы сопоставить время bundle с моментом приёма), затем записи
+#   RECORD (тип, секунды от начала записи, длина) + данные.
+# OSC — датаграмма как пришла (сообщение или bundle),
+# CMD — COMMAND (задержка, сек.; -1 — без ответа) + b"имя\0команда\0ответ".
+MAGIC = b'3PSCLOG\x02'
+START = struct.Struct('<d')
+RECORD = struct.Struct('<BdH')
+COMMAND = struct.Struct('<f')
+OSC = 1
+CMD = 2
+FLUSH_INTERVAL = 1.0
+
+
+class Recorder:
+    """
+    Запись входящих OSC-датаграмм и команд проекторам с задержками в
+    компактный двоичный журнал. Пишет из потока asyncio. Первая запись
+    после сброса ставит таймер в цикле: через FLUSH_INTERVAL секунд
+    буфер уходит на диск, даже если трафик прекратился. При close()
+    тоже.
+    """
+
+    def __init__(self, file_path) -> None:
+        self.path = file_path
+        self.file = open(file_path, 'wb')
+        self.file.write(MAGIC + START.pack(time.time()))
+        self.started = time.monotonic()
+        self.records = 0
+        self._flush_handle = None
+
+    def _write(self, kind, payload):
+        if self.file is None:
+            return
+        now = time.monotonic()
+        self.file.write(RECORD.pack(kind, now - self.started, len(payload)))
+        self.file.write(payload)
+        self.records += 1
+        if self._flush_handle is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # Вне цикла таймер ставить негде — сразу на диск
+                self.file.flush()
+                return
+            self._flush_handle = loop.call_later(FLUSH_INTERVAL, self.flush)
+
+    def flush(self):
+        self._flush_handle = None
+        if self.file is not None:
+            self.file.flush()
+
+    def osc(self, data):
+        self._write(OSC, bytes(data))
+
+    def command(self, name, cmd, answer, latency=None):
+        payload = COMMAND.pack(-1.0 if latency is None else latency) + (
+            f'{name}\0{cmd}\0{answer}'.encode('utf-8', 'replace'))
+        self._write(CMD, payload[:0xFFFF])
+
+    def close(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def _read_header(file, file_path):
+    header = file.read(len(MAGIC) + START.size)
+    if len(header) < len(MAGIC) + START.size or not header.startswith(MAGIC):
+        raise ValueError(f"{file_path} is not a traffic log")
+    started, = START.unpack_from(header, len(MAGIC))
+    return started
+
+
+def read_start(file_path):
+    """
+    time.time() начала записи.
+    """
+    with open(file_path, 'rb') as file:
+        return _read_header(file, file_path)
+
+
+def read_log(file_path):
+    """
+    Записи журнала по порядку:
+        ('osc', t, датаграмма)
+        ('cmd', t, имя, команда, ответ, задержка или None)
+    """
+    with open(file_path, 'rb') as file:
+        _read_header(file, file_path)
+        while True:
+            header = file.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return  # Конец файла (или запись оборвана при сбое)
+            kind, at, size = RECORD.unpack(header)
+            payload = file.read(size)
+            if len(payload) < size:
+                return
+            if kind == OSC:
+                yield ('osc', at, payload)
+            elif kind == CMD:
+                latency, = COMMAND.unpack_from(payload)
+                name, cmd, answer = payload[COMMAND.size:].decode(
+                    'utf-8', 'replace').split('\0', 2)
+                yield ('cmd', at, name, cmd, answer,
+                       None if latency < 0 else latency)
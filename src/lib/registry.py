@@ -0,0 +1,138 @@
+class RegistryState:
+    """
+    Неизменяемый снимок реестра: кортеж проекторов и все индексы по
+    нему. Реестр подменяет его одним присваиванием.
+    """
+
+    __slots__ = ('items', 'by_address', 'by_ip', 'by_octet', 'by_label',
+                 'by_id', 'group')
+
+    def __init__(self, items, group=None) -> None:
+        self.items = items
+        self.by_address = {}
+        self.by_ip = {}
+        self.by_octet = {}
+        self.by_label = {}
+        self.by_id = {}
+        for projector in items:
+            self.by_address[(projector.ip, projector.port)] = projector
+            self.by_ip.setdefault(projector.ip, projector)
+            self.by_octet.setdefault(projector.ip_room_nomber, []).append(
+                projector)
+            self.by_label.setdefault(projector.label, projector)
+            self.by_id.setdefault(projector.id, projector)
+        if group is None:
+            group = dict.fromkeys(p for p in items if p.group)
+        self.group = group
+
+    def with_group(self, group):
+        """
+        Тот же снимок с другим членством в группе.
+        """
+        state = object.__new__(RegistryState)
+        for name in self.__slots__:
+            setattr(state, name, getattr(self, name))
+        state.group = group
+        return state
+
+
+class ProjectorRegistry:
+    """
+    Все проекторы шоу с индексами по адресу (IP и порт), IP, последнему
+    октету, метке, id и членству в группе. Не зависит от интерфейса:
+    группу меняют через set_group, а не через виджеты. По этим же
+    индексам адресует OSC RouteTable. Если у нескольких проекторов
+    один IP, метка или id, get, by_label и by_id возвращают первый
+    добавленный.
+
+    Кортеж и индексы лежат в одном RegistryState, который собирается
+    заново и подменяется одним присваиванием, поэтому поток asyncio
+    читает их без блокировок, пока поток Tk добавляет проекторы:
+    снимок и индексы всегда из одного состояния.
+    """
+
+    def __init__(self) -> None:
+        self._state = RegistryState(())
+
+    def __iter__(self):
+        return iter(self._state.items)
+
+    def __len__(self):
+        return len(self._state.items)
+
+    def __getitem__(self, index):
+        return self._state.items[index]
+
+    def __contains__(self, projector):
+        return self.by_address(projector.ip, projector.port) is projector
+
+    def add(self, projector):
+        """
+        False, если проектор с таким IP и портом уже есть.
+        """
+        if self.by_address(projector.ip, projector.port) is not None:
+            print(f"{projector.ip}:{projector.port} already exists.")
+            return False
+        state = RegistryState(self._state.items + (projector,))
+        self._state = state
+        found = state.by_octet[projector.ip_room_nomber]
+        if len(found) > 1:
+            ips = ', '.join(
+                f"{other.ip}:{other.port}" for other in found)
+            print(f"Last octet {projector.ip_room_nomber} is ambiguous: "
+                  f"{ips}")
+        return True
+
+    def remove(self, projector):
+        if projector not in self:
+            return False
+        self._state = RegistryState(
+            tuple(p for p in self._state.items if p is not projector))
+        return True
+
+    def state(self):
+        """
+        Текущий RegistryState: кортеж и индексы одного момента. Новый
+        объект (is not) после add/remove/set_group.
+        """
+        return self._state
+
+    def snapshot(self):
+        """
+        Текущий кортеж проекторов; меняется (is not) при add/remove.
+        """
+        return self._state.items
+
+    def by_address(self, ip, port):
+        return self._state.by_address.get((ip, port))
+
+    def get(self, ip):
+        return self._state.by_ip.get(ip)
+
+    def by_octet(self, octet):
+        return tuple(self._state.by_octet.get(str(octet), ()))
+
+    def by_label(self, label):
+        return self._state.by_label.get(label)
+
+    def by_id(self, id):
+        return self._state.by_id.get(id)
+
+    def next_id(self):
+        return max(self._state.by_id, default=0) + 1
+
+    def group(self):
+        return list(self._state.group)
+
+    def set_group(self, projector, value):
+        projector.group = bool(value)
+        state = self._state
+        address = (projector.ip, projector.port)
+        if state.by_address.get(address) is not projector:
+            return
+        group = dict(state.group)
+        if projector.group:
+            group[projector] = None
+        else:
+            group.pop(projector, None)
+        self._state = state.with_group(group)
@@ -0,0 +1,486 @@
+import asyncio
+import itertools
+import json
+import time
+
+from lib.breaker import CircuitBreaker, Offline
+from lib.group_fire import FireReport, fire_synchronized
+from lib.metrics import METRICS, command_code
+from lib.ntcontrol import ErrorReply
+from lib.pool import ConnectTimeout, Preempted
+
+# Агент, который держит сессии с проекторами своей подсети.
+#
+# Контроллер и агент обмениваются строками JSON по TCP. Запросы:
+#   {"id": 1, "op": "add", "key": "10.0.1.13:1024",
+#    "spec": [ip, port, login, password, label]}  — без ответа
+#   {"id": 2, "op": "remove", "key": ...}          — без ответа
+#   {"id": 3, "op": "batch", "key": ..., "cmds": [...], "timeout": 2,
+#    "lane": "control"}                            — ответы по порядку
+#   {"id": 4, "op": "fire", "keys": [...], "cmd": "OSH:0", "timeout": 2}
+#     ok: {"answers": {key: ответ}, "lateness": {key: сек.},
+#          "arrivals": {key: сек. от момента запуска},
+#          "fired_after": запуск от приёма запроса, "elapsed": сек.}
+#   {"id": 5, "op": "warm", "key": ...}
+# Ответ {"id": N, "ok": результат} или {"id": N, "err": тип, "msg": текст}
+# приходит, как только запрос выполнен, — запросы не ждут друг друга.
+
+DEFAULT_PORT = 7101
+KEEPALIVE = 5.0
+
+ERRORS = {
+    'Offline': Offline,
+    'ConnectTimeout': ConnectTimeout,
+    'Preempted': Preempted,
+    'TimeoutError': asyncio.TimeoutError,
+    'ConnectionError': ConnectionError,
+}
+
+
+def error_name(error):
+    for name in ('Offline', 'ConnectTimeout', 'Preempted'):
+        if isinstance(error, ERRORS[name]):
+            return name
+    if isinstance(error, asyncio.TimeoutError):
+        return 'TimeoutError'
+    return 'ConnectionError'
+
+
+def encode_answer(answer):
+    if isinstance(answer, Exception):
+        return [error_name(answer), str(answer)]
+    return answer
+
+
+def decode_answer(answer):
+    if isinstance(answer, list):
+        return ERRORS.get(answer[0], ConnectionError)(answer[1])
+    if answer.startswith('ER'):
+        return ErrorReply(answer)
+    return answer
+
+
+def projector_key(ip, port):
+    return f'{ip}:{port}'
+
+
+def parse_address(address, default_port=DEFAULT_PORT):
+    host, _, port = address.partition(':')
+    return host, int(port) if port else default_port
+
+
+class RelayClient:
+    """
+    Соединение контроллера с одним агентом.
+
+    Подключается при первом запросе и после разрыва; проекторы,
+    зарегистрированные через register(), объявляются агенту перед
+    первой командой на новом соединении. Запросы идут без ожидания
+    друг друга, ответы сопоставляются по id.
+    """
+
+    def __init__(self, address) -> None:
+        self.address = address
+        self.host, self.port = parse_address(address)
+        self._specs = {}
+        self._announced = set()
+        self._futures = {}
+        self._ids = itertools.count(1)
+        self._writer = None
+        self._connecting = None
+
+    def register(self, key, spec):
+        self._specs[key] = spec
+
+    def forget(self, key):
+        self._specs.pop(key, None)
+        if key in self._announced:
+            self._announced.discard(key)
+            self._write({'id': next(self._ids), 'op': 'remove', 'key': key})
+        if not self._specs:
+            # Проекторов за агентом не осталось
+            self.close()
+
+    async def _connect(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        self._writer = writer
+        self._announced = set()
+        asyncio.create_task(self._read(reader, writer))
+
+    async def _ensure(self):
+        if self._writer is not None and not self._writer.is_closing():
+            return
+        if self._connecting is None:
+            self._connecting = asyncio.ensure_future(self._connect())
+        try:
+            await self._connecting
+        finally:
+            self._connecting = None
+
+    async def _read(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = json.loads(line)
+                future = self._futures.pop(reply.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(reply)
+        except (ConnectionError, ValueError) as e:
+            print(f"Relay {self.address}: {e}")
+        finally:
+            writer.close()
+            if self._writer is writer:
+                self._writer = None
+            futures, self._futures = self._futures, {}
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(ConnectionResetError(
+                        f"Relay {self.address} closed the connection"))
+
+    def _write(self, message):
+        if self._writer is not None:
+            self._writer.write(
+                json.dumps(message, separators=(',', ':')).encode() + b'\n')
+
+    async def request(self, message, keys, wait):
+        """
+        Отправляет message (с "op") и ждёт ответа не дольше wait секунд.
+        keys — проекторы, которые агент должен знать.
+        """
+        await self._ensure()
+        for key in keys:
+            if key not in self._announced and key in self._specs:
+                self._write({'id': next(self._ids), 'op': 'add',
+                             'key': key, 'spec': self._specs[key]})
+                self._announced.add(key)
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._futures[request_id] = future
+        self._write({'id': request_id, **message})
+        try:
+            reply = await asyncio.wait_for(future, wait)
+        finally:
+            self._futures.pop(request_id, None)
+        if 'err' in reply:
+            raise ERRORS.get(reply['err'], ConnectionError)(reply['msg'])
+        return reply['ok']
+
+    async def fire(self, keys, cmd, timeout=2):
+        """
+        Синхронный запуск на проекторах агента: FireReport по key.
+        Время прихода переводится на часы контроллера: момент запуска
+        у агента — отправка запроса, плюс половина времени связи без
+        работы агента, плюс fired_after.
+        """
+        sent = time.monotonic()
+        result = await self.request(
+            {'op': 'fire', 'keys': keys, 'cmd': cmd, 'timeout': timeout},
+            keys, timeout * 2 + 1)
+        link = time.monotonic() - sent - result['elapsed']
+        fired = sent + max(link, 0.0) / 2 + result['fired_after']
+        report = FireReport(cmd)
+        report.fire_at = fired
+        for key, answer in result['answers'].items():
+            report.answers[key] = decode_answer(answer)
+        report.lateness.update(result['lateness'])
+        for key, offset in result['arrivals'].items():
+            report.arrivals[key] = fired + offset
+        return report
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+RELAYS = {}
+
+
+def relay_client(address):
+    """
+    Общее соединение с агентом на все его проекторы.
+    """
+    client = RELAYS.get(address)
+    if client is None:
+        client = RELAYS[address] = RelayClient(address)
+    return client
+
+
+class RelayPool:
+    """
+    Замена ConnectionPool для проектора за агентом: тот же
+    execute_batch/execute/warm, команды выполняет агент на своих
+    сессиях. breaker учитывает сбои так же, как у ConnectionPool.
+    """
+
+    def __init__(self, client, ip, port, login, password, name=None,
+                 metrics=METRICS) -> None:
+        self.client = client
+        self.key = projector_key(ip, port)
+        self.name = name or ip
+        self.metrics = metrics
+        self.rtt = None
+        self.breaker = CircuitBreaker(self.name)
+        self.recorder = None
+        client.register(self.key, [ip, port, login, password, self.name])
+
+    async def _batch(self, cmds, timeout, lane=None):
+        started = time.monotonic()
+        answers = await self.client.request(
+            {'op': 'batch', 'key': self.key, 'cmds': cmds,
+             'timeout': timeout, 'lane': lane},
+            [self.key], timeout * (len(cmds) + 1) + 1)
+        elapsed = time.monotonic() - started
+        self.rtt = elapsed if self.rtt is None else (
+            0.8 * self.rtt + 0.2 * elapsed)
+        self.metrics.observe(
+            self.name, command_code(cmds[0]), 'response', elapsed)
+        answers = [decode_answer(answer) for answer in answers]
+        if self.recorder is not None:
+            for cmd, answer in zip(cmds, answers):
+                self.recorder.command(self.name, cmd, answer, elapsed)
+        return answers
+
+    async def _probe(self):
+        await self._batch(['QPW'], 2)
+
+    async def execute_batch(self, cmds, timeout, lane=None):
+        self.breaker.check()
+        try:
+            answers = await self._batch(cmds, timeout, lane)
+        except Preempted:
+            raise
+        except (asyncio.TimeoutError, ConnectionError, OSError):
+            self.metrics.timeout(self.name, command_code(cmds[0]))
+            self.breaker.failure(self._probe)
+            raise
+        self.breaker.success()
+        return answers
+
+    async def execute(self, cmd, timeout):
+        answers = await self.execute_batch([cmd], timeout)
+        return answers[0]
+
+    async def warm(self, timeout=2):
+        await self.client.request(
+            {'op': 'warm', 'key': self.key, 'timeout': timeout},
+            [self.key], timeout + 1)
+
+    def close(self):
+        self.breaker.stop()
+        self.client.forget(self.key)
+
+    def stats(self):
+        return {
+            'relay': self.client.address,
+            'online': self.breaker.online,
+            'rtt': self.rtt,
+        }
+
+
+async def fire_split(projectors, cmd, timeout=2):
+    """
+    Синхронный запуск на проекторах и напрямую, и через агентов: одна
+    команда fire на каждого агента, остальные — fire_synchronized.
+    """
+    local = []
+    remote = {}
+    for projector in projectors:
+        if isinstance(projector.pool, RelayPool):
+            remote.setdefault(projector.pool.client, []).append(projector)
+        else:
+            local.append(projector)
+
+    async def fire_remote(client, group):
+        by_key = {projector.pool.key: projector for projector in group}
+        try:
+            remote_report = await client.fire(list(by_key), cmd, timeout)
+        except Exception as e:
+            return {projector: e for projector in group}
+        # Ключи агента -> проекторы контроллера
+        result = FireReport(cmd)
+        for field in ('answers', 'lateness', 'arrivals'):
+            getattr(result, field).update(
+                (by_key[key], value)
+                for key, value in getattr(remote_report, field).items()
+            )
+        return result
+
+    jobs = [fire_remote(client, group) for client, group in remote.items()]
+    if local:
+        jobs.append(fire_synchronized(local, cmd, timeout))
+    report = FireReport(cmd)
+    for result in await asyncio.gather(*jobs):
+        if isinstance(result, FireReport):
+            report.answers.update(result.answers)
+            report.lateness.update(result.lateness)
+            report.arrivals.update(result.arrivals)
+        else:
+            report.answers.update(result)
+    return report
+
+
+class RelayAgent:
+    """
+    Агент рядом с подсетью проекторов: держит их Projector с тёплыми
+    сессиями (раз в keepalive секунд pool.warm) и выполняет запросы
+    контроллеров. Проекторы общие для всех соединений, так что после
+    переподключения контроллер получает те же сессии.
+
+    Аутентификации нет, логины и пароли проекторов приходят открытым
+    текстом: агент слушает 127.0.0.1, пока host не задан явно, и
+    запускать его можно только в доверенной сети.
+    """
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT,
+                 keepalive=KEEPALIVE) -> None:
+        self.host = host
+        self.port = port
+        self.keepalive = keepalive
+        self.projectors = {}
+        self.requests = 0
+        self._handlers = set()
+        self._server = None
+        self._keepalive_task = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.keepalive:
+            self._keepalive_task = asyncio.create_task(self._keep_warm())
+        print(f"Relay agent listening on {self.host}:{self.port}")
+        if self.host not in ('127.0.0.1', 'localhost', '::1'):
+            print("Relay agent has no authentication and receives "
+                  "projector passwords in cleartext: use a trusted "
+                  "network only")
+        return self
+
+    async def stop(self):
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
+        if self._server is not None:
+            self._server.close()
+            # Открытые соединения закрываются отменой их _handle
+            handlers = list(self._handlers)
+            for task in handlers:
+                task.cancel()
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+        for projector in self.projectors.values():
+            projector.close()
+        self.projectors = {}
+
+    async def _keep_warm(self):
+        while True:
+            await asyncio.sleep(self.keepalive)
+            await asyncio.gather(
+                *(projector.pool.warm()
+                  for projector in self.projectors.values()),
+                return_exceptions=True
+            )
+
+    def add(self, key, spec):
+        # lib.projector сам импортирует этот модуль (RelayPool)
+        from lib.projector import Projector
+        if key in self.projectors:
+            return
+        ip, port, login, password, label = spec
+        self.projectors[key] = Projector(
+            ip, port, login, password, label, id=len(self.projectors) + 1)
+
+    def remove(self, key):
+        projector = self.projectors.pop(key, None)
+        if projector is not None:
+            projector.close()
+
+    async def _handle(self, reader, writer):
+        tasks = set()
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = json.loads(line)
+                op = request.get('op')
+                if op == 'add':
+                    self.add(request['key'], request['spec'])
+                elif op == 'remove':
+                    self.remove(request['key'])
+                else:
+                    task = asyncio.create_task(self._serve(request, writer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+        except (ConnectionError, ValueError) as e:
+            print(f"Relay agent: {e}")
+        except asyncio.CancelledError:
+            pass  # stop(): соединение просто закрывается
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._handlers.discard(handler)
+            writer.close()
+
+    async def _serve(self, request, writer):
+        self.requests += 1
+        reply = {'id': request.get('id')}
+        try:
+            reply['ok'] = await self._run(request)
+        except Exception as e:
+            reply['err'] = error_name(e)
+            reply['msg'] = str(e)
+        if not writer.is_closing():
+            writer.write(
+                json.dumps(reply, separators=(',', ':')).encode() + b'\n')
+
+    def _projector(self, key):
+        projector = self.projectors.get(key)
+        if projector is None:
+            raise ConnectionError(f"Unknown projector {key}")
+        return projector
+
+    async def _run(self, request):
+        op = request['op']
+        timeout = request.get('timeout', 2)
+        if op == 'batch':
+            projector = self._projector(request['key'])
+            answers = await projector.pool.execute_batch(
+                request['cmds'], timeout, request.get('lane'))
+            return [encode_answer(answer) for answer in answers]
+        if op == 'fire':
+            received = time.monotonic()
+            projectors = [self._projector(key) for key in request['keys']]
+            report = await fire_synchronized(
+                projectors, request['cmd'], timeout)
+
+            def key(projector):
+                return projector_key(projector.ip, projector.port)
+
+            # Время прихода — от момента запуска: часы агента и
+            # контроллера не совпадают, контроллер переводит его сам
+            return {
+                'answers': {
+                    key(projector): encode_answer(answer)
+                    for projector, answer in report.answers.items()
+                },
+                'lateness': {
+                    key(projector): late
+                    for projector, late in report.lateness.items()
+                },
+                'arrivals': {
+                    key(projector): arrival - report.fire_at
+                    for projector, arrival in report.arrivals.items()
+                },
+                'fired_after': report.fire_at - received,
+                'elapsed': time.monotonic() - received,
+            }
+        if op == 'warm':
+            await self._projector(request['key']).pool.warm(timeout)
+            return None
+        raise ValueError(f"Unknown op {op}")
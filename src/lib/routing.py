@@ -0,0 +1,69 @@
+import re
+
+RANGE_RE = re.compile(r'^(\d+)-(\d+)$')
+CACHE_SIZE = 1024
+
+
+class RouteTable:
+    """
+    Таблица адресации OSC-сообщений на проекторы.
+
+    Индексы по последнему октету, полному IP и метке — индексы
+    ProjectorRegistry (один RegistryState на разбор), своих копий нет.
+    Селектор в конце адреса может быть октетом ("13"), IP
+    ("10.101.10.13"), меткой, диапазоном октетов ("10-24") или списком
+    через запятую ("3,7,9"). Разобранные селекторы кэшируются до
+    следующего изменения реестра.
+    """
+
+    def __init__(self, registry) -> None:
+        self.registry = registry
+        self._cache = ((), {})
+
+    @staticmethod
+    def _resolve_part(state, part):
+        projector = state.by_ip.get(part)
+        if projector is not None:
+            return [projector]
+        found = state.by_octet.get(part)
+        if found:
+            return found
+        projector = state.by_label.get(part)
+        if projector is not None:
+            return [projector]
+        match = RANGE_RE.match(part)
+        if match:
+            first, last = int(match.group(1)), int(match.group(2))
+            found = []
+            for octet in range(first, min(last, 255) + 1):
+                found.extend(state.by_octet.get(str(octet), ()))
+            return found
+        return []
+
+    def resolve(self, selector):
+        """
+        Возвращает кортеж целей для селектора (без повторов, по порядку).
+        """
+        # Кэш привязан к состоянию реестра: после add/remove он не
+        # годится. Разбор идёт по индексам того же состояния, так что
+        # кэш никогда не смешивает старые и новые индексы
+        snapshot, cache = self._cache
+        state = self.registry.state()
+        if snapshot is not state.items:
+            cache = {}
+            self._cache = (state.items, cache)
+        cached = cache.get(selector)
+        if cached is not None:
+            return cached
+
+        found = self._resolve_part(state, selector)
+        if not found and ',' in selector:
+            found = []
+            for part in selector.split(','):
+                found.extend(self._resolve_part(state, part.strip()))
+
+        targets = tuple(dict.fromkeys(found))
+        if len(cache) >= CACHE_SIZE:
+            cache.clear()
+        cache[selector] = targets
+        return targets
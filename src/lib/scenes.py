@@ -0,0 +1,94 @@
+import os
+
+from lib.command_queue import command_kind
+
+# Действие сцены -> команда NTCONTROL ({} — значение из файла)
+ACTIONS = {
+    'open': 'OSH:0',
+    'close': 'OSH:1',
+    'on': 'PON',
+    'off': 'POF',
+    'fade_in': 'VXX:SEFS1={}',
+    'fade_out': 'VXX:SEFS2={}',
+}
+
+
+def scenes_path(file_path):
+    """
+    Файл сцен лежит рядом с файлом проекторов:
+    projectors.txt -> projectors.scenes
+    """
+    return os.path.splitext(file_path)[0] + '.scenes'
+
+
+def read_scenes_file(file_path):
+    """
+    Читает файл сцен в формате:
+        SCENE,SELECTOR,ACTION[,VALUE]
+        ...
+    SELECTOR — как в OSC-адресе (октет, IP, метка, диапазон "10-24"),
+    только список пишется через ";": "3;7;9". ACTION — ключ ACTIONS.
+    Пустые строки и строки с # пропускаются. Возвращает
+    {имя: [(selector, cmd), ...]} в порядке файла.
+    """
+    scenes = {}
+    with open(file_path, "r") as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split(",")
+            if len(parts) not in (3, 4) or parts[2] not in ACTIONS:
+                print(f"Invalid scene line: {line}")
+                continue
+            name, selector, action = parts[:3]
+            cmd = ACTIONS[action]
+            if '{}' in cmd:
+                if len(parts) != 4:
+                    print(f"Invalid scene line: {line}")
+                    continue
+                cmd = cmd.format(parts[3])
+            selector = selector.replace(';', ',')
+            scenes.setdefault(name, []).append((selector, cmd))
+    return scenes
+
+
+class Scene:
+    """
+    Сцена, готовая к запуску: селекторы уже разрешены в проекторы,
+    действия — в команды. shutter — {команда: [проекторы]} для
+    синхронного запуска, commands — [(проектор, команда)] для остального.
+    Для одного проектора побеждает последнее действие того же вида.
+    """
+
+    def __init__(self, name, steps) -> None:
+        self.name = name
+        self.steps = steps
+        self.shutter = {}
+        self.commands = []
+        self.missing = []
+
+    def compile(self, routes):
+        plan = {}
+        missing = []
+        for selector, cmd in self.steps:
+            projectors = routes.resolve(selector)
+            if not projectors:
+                missing.append(selector)
+            for projector in projectors:
+                key = (projector, command_kind(cmd))
+                plan.pop(key, None)
+                plan[key] = cmd
+
+        shutter = {}
+        commands = []
+        for (projector, kind), cmd in plan.items():
+            if kind == 'shutter':
+                shutter.setdefault(cmd, []).append(projector)
+            else:
+                commands.append((projector, cmd))
+        self.shutter, self.commands, self.missing = shutter, commands, missing
+        return self
+
+    def __len__(self):
+        return len(self.commands) + sum(map(len, self.shutter.values()))
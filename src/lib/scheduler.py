@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+from lib.metrics import METRICS
+
+
+class CueScheduler:
+    """
+    Запуск команд в заданный момент по системным часам (время OSC
+    bundle).
+
+    Момент переводится в часы цикла asyncio один раз при постановке,
+    команда запускается через loop.call_at, без блокирующего sleep.
+    За prearm секунд до запуска вызывается arm() — например, чтобы
+    открыть сессии с проекторами. Опоздание каждой команды пишется в
+    metrics (имя 'scheduler', фаза 'lateness'), опоздания больше
+    late_warning печатаются.
+
+    Как в Ingress, для каждой цели (key) ждёт одна команда: новая
+    заменяет ждущую (superseded), точный повтор на то же время
+    отбрасывается (coalesced). Ждут не больше max_pending команд,
+    сверх этого новые отбрасываются (dropped), уже поставленные не
+    трогаются. Счётчики пишутся в metrics под именем 'scheduler'.
+    """
+
+    def __init__(self, prearm=0.5, late_warning=0.005, max_pending=1024,
+                 metrics=METRICS) -> None:
+        self.prearm = prearm
+        self.late_warning = late_warning
+        self.max_pending = max_pending
+        self.metrics = metrics
+        # Цель -> (at, signature, handles)
+        self._cues = {}
+
+    def __len__(self):
+        return len(self._cues)
+
+    def count(self, counter):
+        self.metrics.count('scheduler', counter)
+
+    def schedule(self, at, fire, arm=None, name='cue', key=None,
+                 signature=None):
+        """
+        at — время time.time(), fire() — обычная функция, arm() —
+        корутина или None. key — цель команды (без неё команда ни с чем
+        не сравнивается), signature — подпись для поиска повторов.
+        Возвращает True, если команда поставлена.
+        """
+        if key is None:
+            key = object()
+        pending = self._cues.get(key)
+        if pending is not None:
+            if signature is not None and pending[:2] == (at, signature):
+                self.count('coalesced')
+                return False
+            self._cancel(key)
+            self.count('superseded')
+        elif len(self._cues) >= self.max_pending:
+            self.count('dropped')
+            return False
+
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        target = now + (at - time.time())
+        handles = []
+        if arm is not None and target - self.prearm > now:
+            handles.append(
+                loop.call_at(target - self.prearm, self._arm, arm))
+        elif arm is not None:
+            self._arm(arm)
+        handles.append(
+            loop.call_at(target, self._fire, key, target, fire, name))
+        self._cues[key] = (at, signature, handles)
+        return True
+
+    def _cancel(self, key):
+        for handle in self._cues.pop(key)[2]:
+            handle.cancel()
+
+    def _arm(self, arm):
+        task = asyncio.create_task(arm())
+        task.add_done_callback(self._armed)
+
+    def _armed(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Pre-arm failed: {task.exception()}")
+
+    def _fire(self, key, target, fire, name):
+        self._cues.pop(key, None)
+        lateness = asyncio.get_running_loop().time() - target
+        fire()
+        self.metrics.observe('scheduler', name, 'lateness', lateness)
+        if lateness > self.late_warning:
+            print(f"Cue {name} late by {lateness * 1000:.1f} ms")
+
+    def cancel(self):
+        for key in list(self._cues):
+            self._cancel(key)
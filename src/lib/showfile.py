@@ -0,0 +1,252 @@
+import copy
+import json
+import os
+import tempfile
+import time
+
+from lib.projector import Projector
+from lib.scenes import read_scenes_file, scenes_path
+
+
+def read_projectors_file(file_path, first_id=1):
+    """
+    Читает файл проекторов в формате:
+        width,height
+        IP,PORT,USERNAME,PASSWORD,LABEL,X,Y
+        ...
+    Возвращает (размер окна или None, список (Projector, x, y)).
+    """
+    with open(file_path, "r") as file:
+        lines = file.readlines()
+
+    size = None
+    if len(lines) > 0:
+        width, height = map(int, lines[0].strip().split(","))
+        size = (width, height)
+
+    projectors = []
+    for line in lines[1:]:
+        parts = line.strip().split(",")
+        if len(parts) != 7:
+            print(f"Invalid line format: {line}")
+            continue
+
+        ip, port, username, password, label, x, y = parts
+        try:
+            port = int(port)
+            x = int(x)
+            y = int(y)
+        except ValueError:
+            print(f"Invalid line format: {line}")
+            continue
+
+        projector = Projector(
+            ip=ip,
+            port=port,
+            login=username,
+            password=password,
+            label=label,
+            id=first_id + len(projectors),
+        )
+        projectors.append((projector, x, y))
+    return size, projectors
+
+
+SHOW_VERSION = 1
+STATE_FIELDS = ('power', 'shutter', 'shutter_in_time', 'shutter_out_time')
+
+
+def is_show_file(file_path):
+    return file_path.lower().endswith('.json')
+
+
+def write_show(file_path, data):
+    """
+    Атомарно записывает data: во временный файл рядом, затем
+    os.replace. Не трогает ShowFile, так что может идти в другом потоке.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix='.show-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, "w") as file:
+            json.dump(data, file, indent=2)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ShowFile:
+    """
+    Файл шоу в JSON (версия SHOW_VERSION): подключение и место каждого
+    проектора, группа, последнее известное состояние с временем
+    изменения и сцены. Старый CSV (и .scenes рядом) импортируется.
+
+    Документ хранится в памяти и меняется по событиям (add, move,
+    remove, update), а save() записывает его, только если что-то
+    изменилось: во временный файл рядом, затем os.replace, так что файл
+    никогда не остаётся записанным наполовину.
+    """
+
+    def __init__(self) -> None:
+        self.path = None
+        self.size = None
+        self.scenes = {}
+        self.entries = {}
+        self.dirty = False
+
+    def load(self, file_path, first_id=1):
+        """
+        Читает JSON или CSV, возвращает [(Projector, x, y)]. Проекторы
+        из JSON получают сохранённые группу и состояние (как
+        неподтверждённое — его уточнит опрос). Все они сразу попадают в
+        документ; отклонённые контроллером (дубликаты) вызывающий
+        убирает через remove().
+        """
+        if not is_show_file(file_path):
+            size, projectors = read_projectors_file(file_path, first_id)
+            if size is not None:
+                self.size = size
+            for projector, x, y in projectors:
+                self.add(projector, x, y)
+            if os.path.exists(scenes_path(file_path)):
+                self.scenes.update(read_scenes_file(scenes_path(file_path)))
+            return projectors
+
+        with open(file_path, "r") as file:
+            data = json.load(file)
+        version = data.get('version', 0)
+        if version > SHOW_VERSION:
+            raise ValueError(f"Unsupported show file version {version}")
+
+        if data.get('window'):
+            self.size = tuple(data['window'])
+        projectors = []
+        for item in data.get('projectors', []):
+            try:
+                projector = Projector(
+                    ip=item['ip'],
+                    port=int(item['port']),
+                    login=item['login'],
+                    password=item['password'],
+                    label=item.get('label', ''),
+                    id=first_id + len(projectors),
+                    relay=item.get('relay'),
+                )
+                x, y = int(item['x']), int(item['y'])
+            except (KeyError, TypeError, ValueError):
+                print(f"Invalid projector entry: {item}")
+                continue
+            projector.group = bool(item.get('group', False))
+            state = item.get('state', {})
+            for field in STATE_FIELDS:
+                if field in state:
+                    setattr(projector, field, state[field])
+            self.add(projector, x, y)
+            self.entries[projector]['updated'].update(
+                item.get('updated', {}))
+            projectors.append((projector, x, y))
+        for name, steps in data.get('scenes', {}).items():
+            self.scenes[name] = [tuple(step) for step in steps]
+        self.path = file_path
+        self.dirty = False
+        return projectors
+
+    def add(self, projector, x, y):
+        entry = self.entries.get(projector)
+        if entry is not None:
+            self.move(projector, x, y)
+            return
+        self.entries[projector] = {
+            'ip': projector.ip,
+            'port': projector.port,
+            'login': projector.login,
+            'password': projector.password,
+            'label': projector.label,
+            'x': x,
+            'y': y,
+            'group': projector.group,
+            'state': {
+                field: getattr(projector, field) for field in STATE_FIELDS
+            },
+            'updated': {},
+        }
+        if projector.relay:
+            self.entries[projector]['relay'] = projector.relay
+        self.dirty = True
+
+    def remove(self, projector):
+        if self.entries.pop(projector, None) is not None:
+            self.dirty = True
+
+    def move(self, projector, x, y):
+        entry = self.entries.get(projector)
+        if entry is not None and (entry['x'], entry['y']) != (x, y):
+            entry['x'], entry['y'] = x, y
+            self.dirty = True
+
+    def update(self, projector, changed):
+        """
+        Переносит в документ поля changed проектора (состояние, group).
+        """
+        entry = self.entries.get(projector)
+        if entry is None:
+            return
+        now = time.time()
+        if 'group' in changed and entry['group'] != projector.group:
+            entry['group'] = projector.group
+            self.dirty = True
+        for field in STATE_FIELDS:
+            if field not in changed:
+                continue
+            value = getattr(projector, field)
+            if entry['state'].get(field) != value:
+                entry['state'][field] = value
+                entry['updated'][field] = now
+                self.dirty = True
+
+    def to_dict(self):
+        return {
+            'version': SHOW_VERSION,
+            'saved_at': time.time(),
+            'window': list(self.size) if self.size else None,
+            'projectors': list(self.entries.values()),
+            'scenes': {
+                name: [list(step) for step in steps]
+                for name, steps in self.scenes.items()
+            },
+        }
+
+    def snapshot(self, file_path=None):
+        """
+        (путь, копия документа) для write_show или None, если писать
+        нечего. Сбрасывает dirty: при ошибке записи вызывающий ставит
+        его обратно.
+        """
+        if file_path is not None and file_path != self.path:
+            self.path = file_path
+            self.dirty = True
+        if self.path is None or not self.dirty:
+            return None
+        self.dirty = False
+        # Копия: записи entries меняются дальше, пока файл пишется
+        return self.path, copy.deepcopy(self.to_dict())
+
+    def save(self, file_path=None):
+        """
+        Атомарно записывает документ; без изменений ничего не пишет.
+        Возвращает True, если файл записан.
+        """
+        snapshot = self.snapshot(file_path)
+        if snapshot is None:
+            return False
+        try:
+            write_show(*snapshot)
+        except BaseException:
+            self.dirty = True
+            raise
+        return True
@@ -0,0 +1,183 @@
+import asyncio
+import collections
+import hashlib
+import random
+import time
+
+
+class SimulatedProjector:
+    """
+    Имитация проектора Panasonic по протоколу NTCONTROL.
+
+    Отправляет приветствие "NTCONTROL 1 <rand>", проверяет MD5 и
+    отвечает на команды "00<cmd>" так же, как проектор (QPW, PON, POF,
+    QSH, OSH, QVX/VXX SEFS1/SEFS2). latency ± jitter — задержка в одну
+    сторону: команда "доходит" до проектора (и пишется в log) через неё,
+    ответ идёт столько же, так что RTT около 2 * latency. drop_rate —
+    доля команд без ответа, unresponsive — соединение принимается, но
+    проектор молчит. keep_alive=False закрывает
+    соединение после каждого ответа, как старые прошивки. secure=False —
+    приветствие "NTCONTROL 0", команды без MD5.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, login='admin',
+                 password='panasonic', latency=0.0, jitter=0.0,
+                 drop_rate=0.0, unresponsive=False, keep_alive=True,
+                 power=True, shutter='1', secure=True) -> None:
+        self.host = host
+        self.port = port
+        self.login = login
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.unresponsive = unresponsive
+        self.keep_alive = keep_alive
+        self.secure = secure
+
+        self.power = power
+        self.shutter = shutter
+        self.sefs = {'SEFS1': '1.0', 'SEFS2': '1.0'}
+
+        self.connections = 0
+        self.commands = 0
+        self.log = collections.deque(maxlen=1000)
+        self._server = None
+        self._writers = set()
+
+    async def start(self):
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            # Открытые сессии тоже закрываются, иначе их _handle
+            # отменяется при выходе из asyncio.run
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _delay(self):
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def reply(self, cmd):
+        if cmd == 'QPW':
+            return '001' if self.power else '000'
+        if cmd == 'PON':
+            self.power = True
+            return cmd
+        if cmd == 'POF':
+            self.power = False
+            return cmd
+        if cmd == 'QSH':
+            return self.shutter if self.power else 'ERR3'
+        if cmd in ('OSH:0', 'OSH:1'):
+            if not self.power:
+                return 'ERR3'
+            self.shutter = cmd[-1]
+            return cmd
+        if cmd.startswith('QVX:'):
+            key = cmd[4:]
+            if key in self.sefs:
+                return f'{key}={self.sefs[key]}'
+            return 'ERR2'
+        if cmd.startswith('VXX:'):
+            key, _, value = cmd[4:].partition('=')
+            if key in self.sefs:
+                self.sefs[key] = value
+                return cmd
+            return 'ERR2'
+        return 'ERR1'
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self._writers.add(writer)
+        try:
+            if self.unresponsive:
+                await reader.read()
+                return
+            rand_num = f'{random.getrandbits(32):08x}'
+            await self._delay()
+            if self.secure:
+                writer.write(f'NTCONTROL 1 {rand_num}\r'.encode())
+                auth_data = f'{self.login}:{self.password}:{rand_num}'
+                prefix = hashlib.md5(auth_data.encode()).hexdigest() + '00'
+            else:
+                writer.write(b'NTCONTROL 0\r')
+                prefix = '00'
+            await writer.drain()
+
+            while True:
+                line = await reader.readuntil(b'\r')
+                await self._delay()
+                received_at = time.monotonic()
+                line = line[:-1].decode()
+                if not line.startswith(prefix):
+                    writer.write(b'ERRA\r')
+                    await writer.drain()
+                    return
+                cmd = line[len(prefix):]
+                self.commands += 1
+                self.log.append((received_at, cmd))
+                answer = self.reply(cmd)
+                if random.random() < self.drop_rate:
+                    continue
+                await self._delay()
+                writer.write(f'00{answer}\r'.encode())
+                await writer.drain()
+                if not self.keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError,
+                asyncio.CancelledError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+
+class SimulatedFleet:
+    """
+    Набор имитаций на localhost, каждая на своём порту. Задержка каждой
+    имитации — latency, умноженная на случайный коэффициент в пределах
+    ±latency_spread.
+    """
+
+    def __init__(self, count, dead=0, host='127.0.0.1', latency=0.0,
+                 latency_spread=0.5, **options) -> None:
+        self.host = host
+        # Проекторы в разных местах сети: у каждого своя задержка
+        self.units = [
+            SimulatedProjector(
+                host=host,
+                unresponsive=index >= count - dead,
+                latency=latency * random.uniform(
+                    1 - latency_spread, 1 + latency_spread),
+                **options
+            )
+            for index in range(count)
+        ]
+
+    async def start(self):
+        await asyncio.gather(*(unit.start() for unit in self.units))
+        return self
+
+    async def stop(self):
+        await asyncio.gather(*(unit.stop() for unit in self.units))
+
+    def projector_lines(self):
+        """
+        Строки файла проекторов IP,PORT,USERNAME,PASSWORD,LABEL,X,Y.
+        """
+        return [
+            f'{unit.host},{unit.port},{unit.login},{unit.password},'
+            f'SIM{index + 1},{10 + (index % 4) * 250},'
+            f'{10 + (index // 4) * 100}'
+            for index, unit in enumerate(self.units)
+        ]
@@ -0,0 +1,59 @@
+import threading
+import time
+
+
+class StartupTimer:
+    """
+    Отметки времени запуска: mark(name) запоминает время от создания
+    таймера, report() печатает все отметки с приростом от предыдущей.
+    first(name) отмечает только первый раз — его можно вызывать из
+    любого потока (например, из подписчика на результаты опроса).
+    """
+
+    def __init__(self, verbose=False) -> None:
+        self.started = time.perf_counter()
+        self.verbose = verbose
+        self.marks = []
+        self._lock = threading.Lock()
+
+    def mark(self, name):
+        with self._lock:
+            self.marks.append((name, time.perf_counter() - self.started))
+
+    def first(self, name):
+        with self._lock:
+            if any(mark == name for mark, at in self.marks):
+                return False
+            self.marks.append((name, time.perf_counter() - self.started))
+        return True
+
+    def first_probe(self, projector, error=None):
+        """
+        Подписчик Controller.add_probe_listener: отметка 'first probe'
+        по первому удачному опросу проектора (не по команде); при
+        verbose печатает отчёт.
+        """
+        if error is None:
+            if self.first("first probe") and self.verbose:
+                self.report()
+
+    def elapsed(self, name):
+        for mark, at in self.marks:
+            if mark == name:
+                return at
+        return None
+
+    def lines(self):
+        lines = []
+        previous = 0.0
+        for name, at in self.marks:
+            lines.append(
+                f"{name:<12} {at * 1000:8.1f} ms"
+                f"  (+{(at - previous) * 1000:.1f})"
+            )
+            previous = at
+        return lines
+
+    def report(self):
+        for line in self.lines():
+            print(f"[startup] {line}")
@@ -0,0 +1,186 @@
+"""
+Воспроизведение журнала трафика (app.py/daemon.py --record show.log).
+
+    python src/replay.py show.log --dump
+    python src/replay.py show.log --show sim.json --speed 4
+    python src/replay.py show.log --osc 127.0.0.1:7001
+
+OSC-датаграммы отправляются в том же темпе, что были записаны (или в
+--speed раз быстрее). С --show поднимается свой контроллер с этим
+шоу — проекторы могут быть любыми NTCONTROL (имитация из
+src/simulator.py, стенд, реальные); --osc отправляет на уже
+запущенный app.py или daemon.py. Время bundle переписывается: cue
+выполняется через столько же (с --speed — в столько раз меньше)
+после отправки, через сколько после приёма он стоял в записи. В конце
+печатаются задержки команд из журнала и, с --show, при
+воспроизведении.
+"""
+import argparse
+import asyncio
+import struct
+import time
+
+from lib.controller import Controller
+from lib.metrics import METRICS, Histogram
+from lib.recorder import read_log, read_start
+from lib.relay import parse_address
+from lib.showfile import ShowFile
+
+
+BUNDLE = b'#bundle\0'
+TIMETAG = struct.Struct('>II')
+IMMEDIATELY = (0, 1)
+NTP_DELTA = 2208988800  # Секунды 1900-1970
+
+
+def retime(data, received, now, speed):
+    """
+    Bundle data (и вложенные) с временем, сдвинутым с момента приёма
+    received на момент отправки now; промежуток делится на speed.
+    Время "сразу" не меняется.
+    """
+    if not data.startswith(BUNDLE):
+        return data
+    tag = TIMETAG.unpack_from(data, len(BUNDLE))
+    if tag != IMMEDIATELY:
+        at = tag[0] - NTP_DELTA + tag[1] / 2 ** 32
+        at = now + (at - received) / speed + NTP_DELTA
+        seconds = int(at)
+        tag = (seconds, int((at - seconds) * 2 ** 32))
+    parts = [BUNDLE, TIMETAG.pack(*tag)]
+    index = len(BUNDLE) + TIMETAG.size
+    while index + 4 <= len(data):
+        size, = struct.unpack_from('>i', data, index)
+        element = data[index + 4:index + 4 + size]
+        parts.append(data[index:index + 4])
+        parts.append(retime(element, received, now, speed))
+        index += 4 + size
+    return b''.join(parts)
+
+
+def summary(records):
+    osc = 0
+    latencies = Histogram(size=100000)
+    errors = 0
+    for record in records:
+        if record[0] == 'osc':
+            osc += 1
+        elif record[5] is None:
+            errors += 1
+        else:
+            latencies.add(record[5])
+    return (
+        f"{osc} OSC messages, {latencies.count + errors} commands, "
+        f"{errors} without answer, latency "
+        f"p50={latencies.percentile(50) * 1000:.1f} "
+        f"p95={latencies.percentile(95) * 1000:.1f} "
+        f"max={latencies.percentile(100) * 1000:.1f} ms"
+    )
+
+
+def dump(records):
+    for record in records:
+        if record[0] == 'osc':
+            print(f"{record[1]:10.3f} OSC {len(record[2])} bytes")
+        else:
+            kind, at, name, cmd, answer, latency = record
+            took = '-' if latency is None else f"{latency * 1000:.1f} ms"
+            print(f"{at:10.3f} CMD {name} {cmd} -> {answer} ({took})")
+
+
+async def send(records, target, speed, recorded_at):
+    """
+    Отправляет OSC-записи на target в темпе записи, начиная с первой
+    (пауза до неё не воспроизводится). recorded_at — time.time() начала
+    записи: по нему время bundle переносится на момент отправки.
+    Возвращает (число, максимальное опоздание отправки, сек.).
+    """
+    osc = [record for record in records if record[0] == 'osc']
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_datagram_endpoint(
+        asyncio.DatagramProtocol, remote_addr=target
+    )
+    sent = 0
+    late = 0.0
+    started = loop.time()
+    first = osc[0][1] if osc else 0.0
+    try:
+        for record in osc:
+            at = started + (record[1] - first) / speed
+            delay = at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            late = max(late, loop.time() - at)
+            transport.sendto(retime(
+                record[2], recorded_at + record[1], time.time(), speed))
+            sent += 1
+    finally:
+        transport.close()
+    return sent, late
+
+
+async def replay(records, show_path, target, speed, settle, record_path,
+                 recorded_at):
+    controller = None
+    if show_path:
+        controller = Controller(host='127.0.0.1', port=0)
+        controller.metrics_interval = 0
+        if record_path:
+            controller.record(record_path)
+        show = ShowFile()
+        for projector, x, y in show.load(show_path):
+            if not controller.add(projector):
+                show.remove(projector)
+                projector.close()
+        controller.set_scenes(show.scenes)
+        await controller.start()
+        await controller.refresh(title="Load")
+        METRICS.histograms.clear()
+        target = controller.transport.get_extra_info('sockname')[:2]
+    started = time.perf_counter()
+    try:
+        sent, late = await send(records, target, speed, recorded_at)
+        await asyncio.sleep(settle)
+    finally:
+        if controller is not None:
+            await controller.stop()
+    print(f"Replayed {sent} OSC messages to {target[0]}:{target[1]} in "
+          f"{time.perf_counter() - started:.2f}s at {speed}x, "
+          f"max send lateness {late * 1000:.1f} ms")
+    if controller is not None:
+        for line in METRICS.lines():
+            print(f"[replay] {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a traffic log")
+    parser.add_argument("log", help="file written with --record")
+    parser.add_argument("--dump", action="store_true",
+                        help="print the log and exit")
+    parser.add_argument("--show", help="show.json to replay against")
+    parser.add_argument("--osc", help="host:port of a running controller")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="seconds to wait for the last commands")
+    parser.add_argument("--record", help="record the replay to this log")
+    args = parser.parse_args()
+
+    records = list(read_log(args.log))
+    if args.dump:
+        dump(records)
+    print(f"Recorded: {summary(records)}")
+    if args.dump:
+        return
+    if not args.show and not args.osc:
+        parser.error("--show or --osc is required")
+    target = parse_address(args.osc, 7001) if args.osc else None
+    asyncio.run(replay(
+        records, args.show, target, args.speed, args.settle, args.record,
+        read_start(args.log)
+    ))
+    if args.record:
+        print(f"Replayed: {summary(read_log(args.record))}")
+
+
+if __name__ == "__main__":
+    main()
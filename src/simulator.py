@@ -0,0 +1,57 @@
+"""
+Запуск имитаций проекторов на localhost.
+
+    python src/simulator.py 40 --dead 2 --latency 0.01 --write sim.txt
+
+Файл sim.txt можно открыть в приложении (Load from File) или передать
+в daemon.py.
+"""
+import argparse
+import asyncio
+
+from lib.simulator import SimulatedFleet
+
+
+async def run(args):
+    fleet = SimulatedFleet(
+        args.count,
+        dead=args.dead,
+        host=args.host,
+        latency=args.latency,
+        jitter=args.jitter,
+        drop_rate=args.drop,
+        keep_alive=not args.close_after_reply,
+    )
+    await fleet.start()
+    lines = fleet.projector_lines()
+    if args.write:
+        with open(args.write, "w") as file:
+            file.write("1000,800\n")
+            file.write("\n".join(lines) + "\n")
+        print(f"Projectors file written to {args.write}")
+    print(f"{args.count} simulated projectors ({args.dead} unresponsive)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fleet.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NTCONTROL simulator")
+    parser.add_argument("count", type=int)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--dead", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--drop", type=float, default=0.0)
+    parser.add_argument("--close-after-reply", action="store_true")
+    parser.add_argument("--write", help="write a projectors file")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print("Stopped.")
+
+
+if __name__ == "__main__":
+    main()
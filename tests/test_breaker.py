@@ -0,0 +1,55 @@
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from lib.breaker import CircuitBreaker, Offline  # noqa: E402
+
+
+class CircuitBreakerTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_opens_after_threshold(self):
+        changes = []
+        breaker = CircuitBreaker('A', threshold=3, on_change=changes.append)
+        breaker.failure()
+        breaker.failure()
+        breaker.check()
+        breaker.failure()
+        with self.assertRaises(Offline):
+            breaker.check()
+        self.assertEqual(breaker.rejected, 1)
+        breaker.success()
+        breaker.check()
+        self.assertEqual(changes, [False, True])
+
+    async def test_success_resets_failures(self):
+        breaker = CircuitBreaker('A', threshold=2)
+        breaker.failure()
+        breaker.success()
+        breaker.failure()
+        self.assertTrue(breaker.online)
+
+    async def test_probe_backs_off_until_answer(self):
+        calls = []
+
+        async def probe():
+            calls.append(asyncio.get_running_loop().time())
+            if len(calls) < 3:
+                raise ConnectionRefusedError()
+
+        breaker = CircuitBreaker('A', threshold=1, base_delay=0.01,
+                                 max_delay=0.02)
+        breaker.failure(probe)
+        await asyncio.sleep(0.2)
+        self.assertTrue(breaker.online)
+        self.assertEqual(len(calls), 3)
+        # Пауза растёт: 0.01, затем 0.02 (не больше max_delay)
+        self.assertGreaterEqual(calls[2] - calls[1], 0.019)
+        breaker.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
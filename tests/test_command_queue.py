@@ -0,0 +1,80 @@
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from lib.command_queue import CommandQueue, command_kind  # noqa: E402
+
+
+class Device:
+
+    def __init__(self) -> None:
+        self.sent = []
+        self.release = asyncio.Event()
+
+    async def send(self, cmd):
+        await self.release.wait()
+        self.sent.append(cmd)
+        if cmd == 'BAD':
+            raise ConnectionResetError('lost')
+        return f'ok {cmd}'
+
+
+class CommandQueueTest(unittest.IsolatedAsyncioTestCase):
+
+    def test_command_kind(self):
+        self.assertEqual(command_kind('OSH:1'), 'shutter')
+        self.assertEqual(command_kind('POF'), 'power')
+        self.assertEqual(command_kind('VXX:SEFS2=1.5'), 'SEFS2')
+        self.assertIsNone(command_kind('QSH'))
+
+    async def test_last_writer_wins(self):
+        device = Device()
+        queue = CommandQueue(device.send)
+        # Первая команда уже у проектора, остальные ждут
+        busy = queue.submit('QPW')
+        await asyncio.sleep(0)
+        close = queue.submit('OSH:1')
+        power = queue.submit('PON')
+        opened = queue.submit('OSH:0')
+        query = [queue.submit('QSH'), queue.submit('QSH')]
+        self.assertEqual(queue.pending('shutter'), 'OSH:0')
+        device.release.set()
+        await asyncio.gather(busy, *query)
+        # Схлопнутая команда встаёт на место последней
+        self.assertEqual(device.sent, ['QPW', 'PON', 'OSH:0', 'QSH', 'QSH'])
+        self.assertEqual(close.result(), 'ok OSH:0')
+        self.assertEqual(opened.result(), 'ok OSH:0')
+        self.assertEqual(power.result(), 'ok PON')
+        self.assertEqual(queue.coalesced, 1)
+        self.assertEqual(queue.sent, 5)
+
+    async def test_drop(self):
+        device = Device()
+        queue = CommandQueue(device.send)
+        busy = queue.submit('QPW')
+        await asyncio.sleep(0)
+        close = queue.submit('OSH:1')
+        queue.drop('shutter')
+        self.assertIsNone(queue.pending('shutter'))
+        device.release.set()
+        await busy
+        self.assertEqual(close.result(), 'Superseded')
+        self.assertEqual(device.sent, ['QPW'])
+
+    async def test_error_does_not_stop_queue(self):
+        device = Device()
+        queue = CommandQueue(device.send)
+        first = queue.submit('BAD')
+        after = queue.submit('PON')
+        device.release.set()
+        with self.assertRaises(ConnectionResetError):
+            await first
+        self.assertEqual(await after, 'ok PON')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import asyncio
+import importlib.util
+import os
+import sys
+import unittest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from lib.ingress import Ingress  # noqa: E402
+from lib.metrics import Metrics  # noqa: E402
+
+HAS_OSC = importlib.util.find_spec('pythonosc') is not None
+
+
+class Message:
+
+    def __init__(self, address, *params) -> None:
+        self.address = address
+        self.params = list(params)
+
+
+def shutter_target(address, params):
+    return ('shutter', address.rsplit('/', 1)[-1])
+
+
+class IngressTest(unittest.IsolatedAsyncioTestCase):
+
+    async def submit_all(self, ingress, messages, gap):
+        executed = []
+        for message in messages:
+            async def run(message=message):
+                await asyncio.sleep(0.002)
+                executed.append(message.address)
+            ingress.submit(message, run)
+            await asyncio.sleep(gap)
+        await asyncio.sleep(0.05)
+        return executed
+
+    async def test_open_close_open_keeps_last_intent(self):
+        # Повтор open после close — новое намерение, а не дубликат
+        metrics = Metrics()
+        ingress = Ingress(shutter_target, metrics=metrics, limit=1)
+        executed = await self.submit_all(ingress, [
+            Message('/shutter/open/A', 3),
+            Message('/shutter/close/A', 3),
+            Message('/shutter/open/A', 3),
+        ], gap=0.005)
+        self.assertEqual(executed[-1], '/shutter/open/A')
+        self.assertEqual(metrics.counters['osc']['coalesced'], 0)
+
+    async def test_repeats_are_coalesced(self):
+        metrics = Metrics()
+        ingress = Ingress(shutter_target, metrics=metrics)
+        executed = await self.submit_all(
+            ingress, [Message('/shutter/open/A', 3)] * 5, gap=0.001)
+        self.assertEqual(executed, ['/shutter/open/A'])
+        self.assertEqual(metrics.counters['osc']['coalesced'], 4)
+
+    async def test_targets_are_independent(self):
+        metrics = Metrics()
+        ingress = Ingress(shutter_target, metrics=metrics)
+        executed = await self.submit_all(ingress, [
+            Message('/shutter/open/A', 3),
+            Message('/shutter/open/B', 3),
+            Message('/shutter/open/A', 3),
+        ], gap=0.001)
+        self.assertEqual(executed, ['/shutter/open/A', '/shutter/open/B'])
+        self.assertEqual(metrics.counters['osc']['coalesced'], 1)
+
+    @unittest.skipUnless(HAS_OSC, "python-osc is not installed")
+    async def test_simulator_ends_open(self):
+        from pythonosc.osc_message_builder import build_msg
+
+        from lib.controller import Controller
+        from lib.projector import Projector
+        from lib.simulator import SimulatedProjector
+
+        unit = await SimulatedProjector().start()
+        controller = Controller(host='127.0.0.1', port=0)
+        controller.metrics = Metrics()
+        controller.ingress.metrics = controller.metrics
+        controller.metrics_interval = 0
+        controller.add(Projector(
+            ip=unit.host, port=unit.port, login=unit.login,
+            password=unit.password, label='A', id=1,
+        ))
+        await controller.start()
+        loop = asyncio.get_running_loop()
+        transport, protocol = await loop.create_datagram_endpoint(
+            asyncio.DatagramProtocol,
+            remote_addr=controller.transport.get_extra_info('sockname')[:2],
+        )
+        try:
+            for address in ('/shutter/open/A', '/shutter/close/A',
+                            '/shutter/open/A'):
+                transport.sendto(build_msg(address, 3).dgram)
+                await asyncio.sleep(0.005)
+            await asyncio.sleep(0.3)
+        finally:
+            transport.close()
+            await controller.stop()
+            await unit.stop()
+        self.assertEqual(unit.shutter, '0')
+        self.assertEqual(controller.metrics.counters['osc']['coalesced'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
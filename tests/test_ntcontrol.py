@@ -0,0 +1,110 @@
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from lib.ntcontrol import (  # noqa: E402
+    ErrorReply, Framer, ProtocolError, decode_reply, encode_command,
+    parse_greeting, read_line,
+)
+
+
+class FramerTest(unittest.TestCase):
+
+    def test_reply_split_between_segments(self):
+        framer = Framer()
+        framer.feed(b'000')
+        self.assertIsNone(framer.next())
+        framer.feed(b'01\r')
+        self.assertEqual(framer.next(), b'00001')
+        self.assertIsNone(framer.next())
+        self.assertEqual(len(framer), 0)
+
+    def test_replies_in_one_segment(self):
+        framer = Framer()
+        framer.feed(b'001\r000\r00ER401\r00')
+        self.assertEqual(framer.next(), b'001')
+        self.assertEqual(framer.next(), b'000')
+        self.assertEqual(framer.next(), b'00ER401')
+        self.assertIsNone(framer.next())
+        # Остаток ждёт следующего сегмента
+        framer.feed(b'1\r')
+        self.assertEqual(framer.next(), b'001')
+
+    def test_line_without_cr_over_limit(self):
+        framer = Framer(limit=8)
+        framer.feed(b'0' * 9)
+        with self.assertRaises(ProtocolError):
+            framer.next()
+
+
+class CodecTest(unittest.TestCase):
+
+    def test_decode_reply(self):
+        self.assertEqual(decode_reply(b'00001'), '001')
+        self.assertNotIsInstance(decode_reply(b'00001'), ErrorReply)
+
+    def test_command_error(self):
+        reply = decode_reply(b'00ER401')
+        self.assertIsInstance(reply, ErrorReply)
+        self.assertEqual(reply, 'ER401')
+        self.assertEqual(reply.description, 'command cannot be executed')
+
+    def test_protocol_error(self):
+        reply = decode_reply(b'ERRA')
+        self.assertIsInstance(reply, ErrorReply)
+        self.assertEqual(reply.code, 'ERRA')
+        self.assertEqual(reply.description, 'password mismatch')
+
+    def test_unexpected_reply(self):
+        with self.assertRaises(ProtocolError):
+            decode_reply(b'NTCONTROL 1 abc')
+
+    def test_greeting_without_password(self):
+        greeting = parse_greeting(b'NTCONTROL 0')
+        self.assertFalse(greeting.secure)
+        self.assertEqual(greeting.prefix('admin', 'panasonic'), b'00')
+        self.assertEqual(
+            encode_command(greeting.prefix('admin', 'panasonic'), 'QPW'),
+            b'00QPW\r')
+
+    def test_greeting_with_password(self):
+        greeting = parse_greeting(b'NTCONTROL 1 1a2b3c4d')
+        self.assertTrue(greeting.secure)
+        prefix = greeting.prefix('admin', 'panasonic')
+        self.assertEqual(len(prefix), 34)
+        self.assertTrue(prefix.endswith(b'00'))
+
+    def test_bad_greeting(self):
+        for line in (b'HELLO', b'NTCONTROL', b'NTCONTROL 1', b'NTCONTROL 2'):
+            with self.assertRaises(ProtocolError):
+                parse_greeting(line)
+
+
+class ReadLineTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_segments_from_reader(self):
+        reader = asyncio.StreamReader()
+        framer = Framer()
+        reader.feed_data(b'NTCONTROL 0\r00')
+        self.assertEqual(await read_line(reader, framer), b'NTCONTROL 0')
+        reading = asyncio.ensure_future(read_line(reader, framer))
+        await asyncio.sleep(0)
+        self.assertFalse(reading.done())
+        reader.feed_data(b'1\r000\r')
+        self.assertEqual(await reading, b'001')
+        self.assertEqual(await read_line(reader, framer), b'000')
+
+    async def test_closed_mid_reply(self):
+        reader = asyncio.StreamReader()
+        reader.feed_data(b'00')
+        reader.feed_eof()
+        with self.assertRaises(ConnectionResetError):
+            await read_line(reader, Framer())
+
+
+if __name__ == '__main__':
+    unittest.main()
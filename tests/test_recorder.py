@@ -0,0 +1,78 @@
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from lib.recorder import Recorder, read_log, read_start  # noqa: E402
+
+HAS_OSC = importlib.util.find_spec('pythonosc') is not None
+
+
+class RecorderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'show.log')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        before = time.time()
+        recorder = Recorder(self.path)
+        recorder.osc(b'/shutter/open/13\0\0\0\0,i\0\0\0\0\0\x03')
+        recorder.command('A', 'OSH:0', '000', latency=0.012)
+        recorder.command('A', 'QPW', 'Timeout')
+        recorder.close()
+        self.assertGreaterEqual(read_start(self.path), before)
+        records = list(read_log(self.path))
+        self.assertEqual([record[0] for record in records],
+                         ['osc', 'cmd', 'cmd'])
+        self.assertTrue(records[0][2].startswith(b'/shutter/open/13'))
+        self.assertEqual(records[1][2:5], ('A', 'OSH:0', '000'))
+        self.assertAlmostEqual(records[1][5], 0.012, places=6)
+        self.assertIsNone(records[2][5])
+        self.assertLessEqual(records[0][1], records[2][1])
+
+    def test_truncated_record_is_skipped(self):
+        recorder = Recorder(self.path)
+        recorder.command('A', 'PON', '000', latency=0.01)
+        recorder.command('A', 'POF', '000', latency=0.01)
+        recorder.close()
+        with open(self.path, 'r+b') as file:
+            file.truncate(os.path.getsize(self.path) - 3)
+        records = list(read_log(self.path))
+        self.assertEqual([record[3] for record in records], ['PON'])
+
+    def test_not_a_log(self):
+        for data in (b'', b'3PSCLOG\x02', b'3PSCLOG\x01' + b'\0' * 8):
+            with open(self.path, 'wb') as file:
+                file.write(data)
+            with self.assertRaises(ValueError):
+                read_start(self.path)
+
+    @unittest.skipUnless(HAS_OSC, "python-osc is not installed")
+    def test_retime_bundle(self):
+        from pythonosc.osc_bundle_builder import OscBundleBuilder
+        from pythonosc.osc_message_builder import build_msg
+        from pythonosc.osc_packet import OscPacket
+
+        from replay import retime
+
+        # Cue стоял через 0.5 с после приёма; на 2x — через 0.25 с
+        received = time.time()
+        bundle = OscBundleBuilder(received + 0.5)
+        bundle.add_content(build_msg('/shutter/open/13', 3))
+        data = retime(bundle.build().dgram, received, received + 10, 2)
+        message, = OscPacket(data).messages
+        self.assertAlmostEqual(message.time, received + 10.25, places=4)
+        self.assertEqual(message.message.address, '/shutter/open/13')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from lib.relay import RelayAgent  # noqa: E402
+
+
+class RelayAgentTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_loopback_by_default(self):
+        agent = await RelayAgent(port=0, keepalive=0).start()
+        try:
+            self.assertEqual(agent.host, '127.0.0.1')
+        finally:
+            await agent.stop()
+
+    async def test_stop_with_client_connected(self):
+        agent = await RelayAgent(port=0, keepalive=0).start()
+        reader, writer = await asyncio.open_connection(
+            '127.0.0.1', agent.port)
+        await asyncio.sleep(0.05)
+        handlers = list(agent._handlers)
+        self.assertEqual(len(handlers), 1)
+        await asyncio.wait_for(agent.stop(), 2)
+        # Обработчик соединения завершился сам, а не отменой
+        self.assertTrue(handlers[0].done())
+        self.assertFalse(handlers[0].cancelled())
+        self.assertEqual(await reader.read(), b'')
+        writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from lib.projector import Projector  # noqa: E402
+from lib.registry import ProjectorRegistry  # noqa: E402
+from lib.routing import RouteTable  # noqa: E402
+
+
+def make_projector(ip, label, port=1024, id=1):
+    return Projector(ip=ip, port=port, login='admin',
+                     password='panasonic', label=label, id=id)
+
+
+class RouteTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = ProjectorRegistry()
+        self.routes = RouteTable(self.registry)
+        self.a = make_projector('10.101.10.13', 'Left', id=1)
+        self.b = make_projector('10.101.10.14', 'Right', id=2)
+        self.registry.add(self.a)
+        self.registry.add(self.b)
+
+    def test_selectors(self):
+        self.assertEqual(self.routes.resolve('13'), (self.a,))
+        self.assertEqual(self.routes.resolve('10.101.10.14'), (self.b,))
+        self.assertEqual(self.routes.resolve('Right'), (self.b,))
+        self.assertEqual(self.routes.resolve('10-24'), (self.a, self.b))
+        self.assertEqual(self.routes.resolve('14, 13,Left'), (self.b, self.a))
+        self.assertEqual(self.routes.resolve('99'), ())
+
+    def test_add_after_resolve(self):
+        self.assertEqual(self.routes.resolve('15'), ())
+        self.assertEqual(self.routes.resolve('10-24'), (self.a, self.b))
+        c = make_projector('10.101.10.15', 'Centre', id=3)
+        self.registry.add(c)
+        self.assertEqual(self.routes.resolve('15'), (c,))
+        self.assertEqual(self.routes.resolve('10-24'), (self.a, self.b, c))
+
+    def test_remove_after_resolve(self):
+        self.assertEqual(self.routes.resolve('Left'), (self.a,))
+        self.registry.remove(self.a)
+        self.assertEqual(self.routes.resolve('Left'), ())
+        self.assertEqual(self.routes.resolve('10-24'), (self.b,))
+
+    def test_same_octet_on_two_subnets(self):
+        # Симуляторы: один IP, разные порты; октет адресует оба
+        c = make_projector('10.101.20.13', 'Far', id=3)
+        d = make_projector('10.101.10.13', 'Port2', port=1025, id=4)
+        self.registry.add(c)
+        self.registry.add(d)
+        self.assertEqual(self.routes.resolve('13'), (self.a, c, d))
+        self.assertEqual(self.routes.resolve('10.101.10.13'), (self.a,))
+
+    def test_registry_indexes(self):
+        self.assertIs(self.registry.by_id(2), self.b)
+        self.assertEqual(self.registry.next_id(), 3)
+        self.registry.set_group(self.b, True)
+        self.assertEqual(self.registry.group(), [self.b])
+        self.registry.remove(self.b)
+        self.assertEqual(self.registry.group(), [])
+        self.assertIsNone(self.registry.by_id(2))
+
+
+if __name__ == '__main__':
+    unittest.main()
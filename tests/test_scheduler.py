@@ -0,0 +1,79 @@
+import asyncio
+import importlib.util
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from lib.metrics import Metrics  # noqa: E402
+from lib.scheduler import CueScheduler  # noqa: E402
+
+HAS_OSC = importlib.util.find_spec('pythonosc') is not None
+
+
+class CueSchedulerTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_newer_cue_replaces_pending(self):
+        metrics = Metrics()
+        scheduler = CueScheduler(metrics=metrics)
+        fired = []
+        at = time.time() + 0.02
+        scheduler.schedule(at, lambda: fired.append('close'),
+                           key='A', signature='close')
+        scheduler.schedule(at, lambda: fired.append('close'),
+                           key='A', signature='close')
+        scheduler.schedule(at + 0.01, lambda: fired.append('open'),
+                           key='A', signature='open')
+        scheduler.schedule(at, lambda: fired.append('other'), key='B')
+        self.assertEqual(len(scheduler), 2)
+        await asyncio.sleep(0.1)
+        self.assertEqual(sorted(fired), ['open', 'other'])
+        self.assertEqual(len(scheduler), 0)
+        counters = metrics.counters['scheduler']
+        self.assertEqual(counters['coalesced'], 1)
+        self.assertEqual(counters['superseded'], 1)
+
+    async def test_cap(self):
+        metrics = Metrics()
+        scheduler = CueScheduler(max_pending=3, metrics=metrics)
+        at = time.time() + 60
+        added = [scheduler.schedule(at, lambda: None) for _ in range(5)]
+        self.assertEqual(added, [True] * 3 + [False] * 2)
+        self.assertEqual(len(scheduler), 3)
+        self.assertEqual(metrics.counters['scheduler']['dropped'], 2)
+        scheduler.cancel()
+        self.assertEqual(len(scheduler), 0)
+
+    @unittest.skipUnless(HAS_OSC, "python-osc is not installed")
+    async def test_bundle_flood_keeps_one_cue_per_target(self):
+        from pythonosc.osc_bundle_builder import OscBundleBuilder
+        from pythonosc.osc_message_builder import build_msg
+
+        from lib.controller import Controller
+
+        controller = Controller(host='127.0.0.1', port=0)
+        controller.metrics = Metrics()
+        controller.scheduler.metrics = controller.metrics
+        controller.metrics_interval = 0
+        await controller.start()
+        protocol = controller.transport.get_protocol()
+        at = time.time() + 60
+        try:
+            for index in range(6000):
+                action = 'open' if index % 2 else 'close'
+                bundle = OscBundleBuilder(at + index * 0.001)
+                bundle.add_content(
+                    build_msg(f'/shutter/{action}/{index % 3}', 3))
+                protocol.datagram_received(
+                    bundle.build().dgram, ('127.0.0.1', 9))
+            self.assertEqual(len(controller.scheduler), 3)
+        finally:
+            await controller.stop()
+        self.assertEqual(len(controller.scheduler), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
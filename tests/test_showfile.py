@@ -0,0 +1,75 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from lib.projector import Projector  # noqa: E402
+from lib.showfile import ShowFile  # noqa: E402
+
+
+def make_projector(ip, label, id=1):
+    return Projector(ip=ip, port=1024, login='admin',
+                     password='panasonic', label=label, id=id)
+
+
+class ShowFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'show.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        show = ShowFile()
+        show.size = (1280, 800)
+        projector = make_projector('10.0.0.13', 'Left')
+        projector.group = True
+        show.add(projector, 10, 20)
+        show.add(make_projector('10.0.0.14', 'Right', id=2), 260, 20)
+        projector.shutter = True
+        projector.shutter_in_time = '1.0'
+        show.update(projector, ['shutter', 'shutter_in_time'])
+        show.scenes['intro'] = [('13', 'OSH:1'), ('14', 'VXX:SEFS1=1.5')]
+        self.assertTrue(show.save(self.path))
+        self.assertFalse(show.save())
+
+        loaded = ShowFile()
+        projectors = loaded.load(self.path)
+        self.assertEqual(loaded.size, (1280, 800))
+        self.assertEqual(
+            [(p.label, x, y) for p, x, y in projectors],
+            [('Left', 10, 20), ('Right', 260, 20)])
+        left = projectors[0][0]
+        self.assertTrue(left.group)
+        self.assertTrue(left.shutter)
+        self.assertEqual(left.shutter_in_time, '1.0')
+        self.assertEqual(loaded.scenes['intro'][1], ('14', 'VXX:SEFS1=1.5'))
+        self.assertFalse(loaded.dirty)
+
+    def test_snapshot_is_a_copy(self):
+        show = ShowFile()
+        projector = make_projector('10.0.0.13', 'Left')
+        show.add(projector, 10, 20)
+        path, data = show.snapshot(self.path)
+        self.assertEqual(path, self.path)
+        self.assertFalse(show.dirty)
+        # Изменения после снимка не попадают в уже снятый документ
+        show.move(projector, 50, 60)
+        self.assertEqual(data['projectors'][0]['x'], 10)
+        self.assertTrue(show.dirty)
+
+    def test_newer_version_is_rejected(self):
+        with open(self.path, 'w') as file:
+            json.dump({'version': 99, 'projectors': []}, file)
+        with self.assertRaises(ValueError):
+            ShowFile().load(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import asyncio
+import importlib.util
+import os
+import sys
+import unittest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from lib.projector import Projector  # noqa: E402
+from lib.simulator import SimulatedProjector  # noqa: E402
+
+HAS_OSC = importlib.util.find_spec('pythonosc') is not None
+
+
+def make_projector(unit, label='A'):
+    return Projector(
+        ip=unit.host, port=unit.port, login=unit.login,
+        password=unit.password, label=label, id=1,
+    )
+
+
+class StateCacheTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        # Ответ идёт ~40 мс: команда успевает побыть "в пути"
+        self.unit = await SimulatedProjector(latency=0.02).start()
+        self.projector = make_projector(self.unit)
+        await self.projector.get_info()
+
+    async def asyncTearDown(self):
+        self.projector.close()
+        await self.unit.stop()
+
+    def shutter_commands(self):
+        return [cmd for at, cmd in self.unit.log if cmd.startswith('OSH')]
+
+    async def test_repeated_command_is_cached(self):
+        self.unit.shutter = '0'
+        await self.projector.get_info()
+        self.assertEqual(await self.projector.shutter_open(), 'Cached')
+        self.assertEqual(self.shutter_commands(), [])
+
+    async def test_not_cached_while_opposite_in_flight(self):
+        self.unit.shutter = '0'
+        await self.projector.get_info()
+        closing = asyncio.ensure_future(self.projector.shutter_close())
+        await asyncio.sleep(0.005)
+        self.assertFalse(
+            self.projector.known('shutter', Projector.SHUTTER_OPEN))
+        await closing
+
+    async def test_not_cached_while_opposite_queued(self):
+        self.unit.shutter = '0'
+        await self.projector.get_info()
+        power = asyncio.ensure_future(self.projector.power_on(force=True))
+        closing = asyncio.ensure_future(self.projector.shutter_close())
+        await asyncio.sleep(0.005)
+        self.assertFalse(
+            self.projector.known('shutter', Projector.SHUTTER_OPEN))
+        await asyncio.gather(power, closing)
+
+    async def test_force_without_state_effect(self):
+        await self.projector.submit('QPW', force=True)
+        self.assertNotIn(None, self.projector.updated_at)
+
+    @unittest.skipUnless(HAS_OSC, "python-osc is not installed")
+    async def test_group_open_after_close_in_flight(self):
+        from lib.controller import Controller
+
+        controller = Controller()
+        controller.add(self.projector)
+        controller.set_group(self.projector, True)
+        self.unit.shutter = '0'
+        await self.projector.get_info()
+        closing = asyncio.ensure_future(
+            controller.shutter_close(self.projector))
+        await asyncio.sleep(0.005)
+        await controller.open_group_shutter()
+        await closing
+        self.assertEqual(self.shutter_commands(), ['OSH:1', 'OSH:0'])
+        self.assertEqual(self.unit.shutter, '0')
+
+
+if __name__ == '__main__':
+    unittest.main()